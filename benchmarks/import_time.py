@@ -0,0 +1,59 @@
+""" Measures the cold-start cost of importing irslashdata.
+
+Each measurement runs a fresh interpreter with -X importtime and reads the
+cumulative time of the requested module from its report. The median over
+--runs interpreters is printed, and the script exits with status 1 when it
+exceeds --budget, so it can be used as a check in CI:
+
+    python benchmarks/import_time.py --budget 20
+    python benchmarks/import_time.py --module irslashdata.client
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module):
+    """ Returns the cumulative import time of module in milliseconds, as
+    reported by a fresh interpreter.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = REPO_ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    for line in completed.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+
+    raise RuntimeError(f"No import time reported for {module}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='irslashdata')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=None, help='maximum median import time in ms')
+    args = parser.parse_args()
+
+    timings = [measure(args.module) for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(f"import {args.module}: median {median:.2f} ms, min {min(timings):.2f} ms over {args.runs} runs")
+
+    if args.budget is not None and median > args.budget:
+        print(f"Import time exceeds the budget of {args.budget:.2f} ms.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,40 @@
+import importlib
 import logging
 
 logger = logging.getLogger(__name__)
+
+# Submodules, and the httpx import that comes with the client, are only loaded
+# when one of these names is first accessed, keeping 'import irslashdata' cheap.
+LAZY_ATTRIBUTES = {
+    'AdaptiveConcurrency': 'irslashdata.concurrency',
+    'BulkPlanner': 'irslashdata.planner',
+    'Client': 'irslashdata.client',
+    'ChartHistoryStore': 'irslashdata.history',
+    'ChunkStore': 'irslashdata.chunk_store',
+    'RateLimitCoordinator': 'irslashdata.ratelimit',
+    'DriverIndex': 'irslashdata.drivers',
+    'FollowedResultsWatcher': 'irslashdata.watchers',
+    'PriorityScheduler': 'irslashdata.scheduler',
+    'StandingsEngine': 'irslashdata.standings',
+    'RaceGuideWatcher': 'irslashdata.watchers',
+    'RecordTuples': 'irslashdata.transforms',
+    'ReferenceRegistry': 'irslashdata.registry',
+    'ResultsDatabase': 'irslashdata.results_db',
+    'constants': 'irslashdata.constants',
+    'exceptions': 'irslashdata.exceptions',
+    'helpers': 'irslashdata.helpers',
+}
+
+
+def __getattr__(name):
+    if name in LAZY_ATTRIBUTES:
+        module = importlib.import_module(LAZY_ATTRIBUTES[name])
+        value = module if LAZY_ATTRIBUTES[name] == __name__ + '.' + name else getattr(module, name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(LAZY_ATTRIBUTES))
@@ -0,0 +1,5 @@
+import sys
+
+from irslashdata.cli import main
+
+sys.exit(main())
@@ -0,0 +1,95 @@
+from irslashdata import logger
+from irslashdata.streaming import JsonArrayParser
+
+import hashlib
+import json
+import mmap
+import os
+
+
+# This module holds raw chunk files downloaded by Client in store mode, for
+# example search_results(..., store=ChunkStore('chunks')). Chunk bodies are
+# written to disk as they stream in and are only parsed later, through
+# memory-mapped reads, so large backfills are bound by disk rather than RAM.
+
+# Bytes of a memory-mapped chunk handed to the incremental parser at a time.
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class ChunkStore:
+    def __init__(self, directory: str):
+        """ Stores chunk files in directory, creating it if needed. Chunk file
+        names from iRacing are unique, so they are used as-is.
+        """
+        self.directory = directory
+        self.manifest_directory = os.path.join(directory, 'manifests')
+        os.makedirs(self.manifest_directory, exist_ok=True)
+
+    def path_for(self, chunk_filename):
+        return os.path.join(self.directory, os.path.basename(chunk_filename))
+
+    def manifest_path(self, request_key):
+        """ Returns the path of the download manifest for a request.
+        """
+        digest = hashlib.sha256(request_key.encode('utf-8')).hexdigest()
+        return os.path.join(self.manifest_directory, digest + '.json')
+
+    def has(self, chunk_filename):
+        """ True if the chunk has been completely downloaded. Partial
+        downloads are kept under a different name until they finish.
+        """
+        return os.path.exists(self.path_for(chunk_filename))
+
+    def paths(self):
+        """ Returns the paths of every complete chunk file in the store.
+        """
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if not name.endswith('.part') and os.path.isfile(os.path.join(self.directory, name))
+        )
+
+
+def read_chunk(path):
+    """ Returns the list of records in the chunk file at path, read through
+    a memory map.
+    """
+    if os.path.getsize(path) == 0:
+        return []
+
+    with open(path, 'rb') as chunk_file:
+        with mmap.mmap(chunk_file.fileno(), 0, access=mmap.ACCESS_READ) as chunk_map:
+            try:
+                return json.loads(chunk_map[:])
+            except ValueError:
+                logger.warning(f"Chunk file {path} could not be decoded.")
+                return []
+
+
+def iter_chunk(path):
+    """ Yields the records of the chunk file at path one at a time, decoding
+    the memory-mapped file in blocks, so the records of a chunk are never all
+    held in memory at once.
+    """
+    if os.path.getsize(path) == 0:
+        return
+
+    parser = JsonArrayParser()
+
+    with open(path, 'rb') as chunk_file:
+        with mmap.mmap(chunk_file.fileno(), 0, access=mmap.ACCESS_READ) as chunk_map:
+            for start in range(0, len(chunk_map), READ_BLOCK_SIZE):
+                yield from parser.feed(chunk_map[start:start + READ_BLOCK_SIZE])
+
+    try:
+        yield from parser.close()
+    except ValueError:
+        logger.warning(f"Chunk file {path} could not be decoded.")
+
+
+def iter_records(paths):
+    """ Yields the records of each chunk file in paths in turn, one record
+    at a time.
+    """
+    for path in paths:
+        yield from iter_chunk(path)
@@ -0,0 +1,401 @@
+""" Command line entry point for bulk harvests, run as:
+
+    python -m irslashdata [options] results --series-id 139 --season 2022:3
+    python -m irslashdata [options] subsessions 45000001 45000002 ...
+    python -m irslashdata [options] laps --ids-file subsession_ids.txt
+
+Credentials are read from the IRACING_USERNAME and IRACING_PASSWORD
+environment variables, or prompted for.
+"""
+from irslashdata import logger
+from irslashdata.exceptions import AuthenticationError, IracingError
+
+import argparse
+import asyncio
+import getpass
+import json
+import logging
+import os
+import sys
+import time
+
+
+# A job is split into units: one search_results() call per series, season and
+# race week, or one subsession per ID. Units run concurrently on a pool of
+# workers and their records are appended to a JSON Lines file as each one
+# completes. The key of each completed unit is appended to a job-state file,
+# so a job that is stopped or has failures picks up where it left off when run
+# again with the same --state file. Each entry also records the size of the
+# output file once its unit was written, and a resumed job truncates the
+# output back to the last one, so a unit that was written but not yet
+# recorded as done isn't left in the output twice.
+
+# Parquet output is collected as JSON Lines next to the output file and
+# converted, PARQUET_BATCH_ROWS records at a time, once every unit is done. It
+# requires the optional pyarrow package.
+
+PROGRESS_INTERVAL = 5.0
+PARQUET_BATCH_ROWS = 64 * 1024
+
+
+class JobState:
+    def __init__(self, path):
+        """ The keys of the completed units of a job, journaled to the file at
+        path as a JSON line per unit, or only kept in memory if path is None.
+        """
+        self.path = path
+        self.done = set()
+        # Size of the output file after the last completed unit.
+        self.output_size = None
+
+        if path is not None and os.path.exists(path):
+            self._replay()
+
+    def _replay(self):
+        """ Loads the journal. A last line cut short by the job being stopped
+        is dropped from the file, and its unit is run again.
+        """
+        complete_size = 0
+
+        with open(self.path, 'rb') as state_file:
+            for line in state_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                self.done.add(entry['key'])
+                self.output_size = entry['output_size']
+                complete_size += len(line)
+
+        if complete_size < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as state_file:
+                state_file.truncate(complete_size)
+
+    def mark_done(self, key, output_size):
+        self.done.add(key)
+        self.output_size = output_size
+
+        if self.path is not None:
+            with open(self.path, 'a') as state_file:
+                state_file.write(json.dumps({'key': key, 'output_size': output_size}) + '\n')
+
+
+class Harvest:
+    def __init__(self, output_path, state, concurrency):
+        self.state = state
+        self.concurrency = concurrency
+        self.parquet_path = None
+
+        if output_path.endswith('.parquet'):
+            self.parquet_path = output_path
+            output_path += '.jsonl'
+        self.output_path = output_path
+
+        self.units = 0
+        self.skipped = 0
+        self.completed = 0
+        self.failed = 0
+        self.records = 0
+        self.bytes = 0
+        self.started = None
+        self.last_progress = 0.0
+
+    def _progress(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_progress < PROGRESS_INTERVAL:
+            return
+        self.last_progress = now
+
+        elapsed = now - self.started
+        print(
+            f"[{self.completed + self.failed}/{self.units - self.skipped}] "
+            f"{self.records} records, {self.failed} failed, "
+            f"{self.records / elapsed if elapsed else 0:.1f} records/s",
+            file=sys.stderr
+        )
+
+    async def _worker(self, queue, output_file, run):
+        while True:
+            try:
+                key, unit = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                records = await run(unit)
+            except AuthenticationError:
+                raise
+            except IracingError as exc:
+                logger.warning(f"{key} failed: {exc}")
+                records = None
+
+            if records is None:
+                self.failed += 1
+            else:
+                for record in records:
+                    line = json.dumps(record) + '\n'
+                    output_file.write(line)
+                    self.bytes += len(line)
+                output_file.flush()
+                self.records += len(records)
+                self.completed += 1
+                self.state.mark_done(key, output_file.tell())
+
+            self._progress()
+
+    async def run(self, units, run):
+        """ Runs run(unit) for every (key, unit) in units not already done,
+        concurrency at a time. run returns the list of records to write, or
+        None if the unit failed and should be tried again next time.
+        """
+        self.started = time.monotonic()
+        queue = asyncio.Queue()
+
+        for key, unit in units:
+            self.units += 1
+            if key in self.state.done:
+                self.skipped += 1
+            else:
+                queue.put_nowait((key, unit))
+
+        if self.skipped:
+            print(f"Skipping {self.skipped} units already done.", file=sys.stderr)
+
+        with open(self.output_path, 'a') as output_file:
+            await asyncio.gather(*[
+                self._worker(queue, output_file, run)
+                for _ in range(self.concurrency)
+            ])
+
+        self._progress(force=True)
+
+        if self.parquet_path is not None and self.failed == 0:
+            write_parquet(self.output_path, self.parquet_path)
+
+    def restore_output(self):
+        """ Cuts the output back to the units recorded as done, dropping any
+        written after the state was last saved. Call before run() when
+        resuming. Raises ValueError if the output is shorter than recorded.
+        """
+        if self.state.output_size is None:
+            return
+
+        size = os.path.getsize(self.output_path) if os.path.exists(self.output_path) else 0
+        if size < self.state.output_size:
+            raise ValueError(
+                f"{self.output_path} is smaller than the job state records. "
+                "Use a new --state file to start the job over."
+            )
+
+        if size > self.state.output_size:
+            print(f"Dropping {size - self.state.output_size} bytes of unfinished units from {self.output_path}.",
+                  file=sys.stderr)
+            with open(self.output_path, 'r+b') as output_file:
+                output_file.truncate(self.state.output_size)
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        return (
+            f"{self.completed} units done, {self.failed} failed, {self.skipped} skipped in {elapsed:.1f} s: "
+            f"{self.records} records ({self.records / elapsed if elapsed else 0:.1f}/s), "
+            f"{self.bytes / 1024 / 1024:.1f} MiB ({self.bytes / 1024 / 1024 / elapsed if elapsed else 0:.2f} MiB/s)"
+        )
+
+
+def write_parquet(jsonl_path, parquet_path, batch_rows=PARQUET_BATCH_ROWS):
+    """ Converts the JSON Lines file at jsonl_path to Parquet, batch_rows
+    records at a time. The schema is inferred from the first batch; fields
+    first seen in later batches are dropped.
+    """
+    import pyarrow
+    import pyarrow.parquet
+
+    writer = None
+    written = 0
+
+    def write_batch(records):
+        nonlocal writer, written
+        if writer is None:
+            table = pyarrow.Table.from_pylist(records)
+            writer = pyarrow.parquet.ParquetWriter(parquet_path, table.schema)
+        else:
+            table = pyarrow.Table.from_pylist(records, schema=writer.schema)
+        writer.write_table(table)
+        written += len(records)
+
+    try:
+        with open(jsonl_path, 'r') as jsonl_file:
+            records = []
+            for line in jsonl_file:
+                if line.strip():
+                    records.append(json.loads(line))
+                if len(records) >= batch_rows:
+                    write_batch(records)
+                    records = []
+
+            if records or writer is None:
+                write_batch(records)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(f"Wrote {written} records to {parquet_path}.", file=sys.stderr)
+
+
+def _season(value):
+    try:
+        season_year, season_quarter = value.split(':')
+        return int(season_year), int(season_quarter)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected YEAR:QUARTER, got {value!r}.")
+
+
+def _read_ids(args):
+    ids = list(args.ids)
+
+    if args.ids_file is not None:
+        ids_file = sys.stdin if args.ids_file == '-' else open(args.ids_file, 'r')
+        with ids_file:
+            ids += [int(line) for line in ids_file if line.strip()]
+
+    return ids
+
+
+def _results_units(args):
+    race_weeks = args.race_week if args.race_week else [None]
+
+    for series_id in args.series_id:
+        for season_year, season_quarter in args.season:
+            for race_week_num in race_weeks:
+                key = f"results:{series_id}:{season_year}:{season_quarter}:{race_week_num}"
+                yield key, {
+                    'series_id': series_id,
+                    'season_year': season_year,
+                    'season_quarter': season_quarter,
+                    'race_week_num': race_week_num
+                }
+
+
+def _unit_runners(client):
+    async def results(unit):
+        return await client.search_results(**unit, raise_errors=True)
+
+    async def subsessions(subsession_id):
+        subsession = await client.subsession_data(subsession_id)
+        return [subsession] if subsession is not None else None
+
+    async def laps(subsession_id):
+        bundle = await client.subsession_bundle(subsession_id)
+        if bundle is None or bundle['failed']:
+            return None
+
+        return [
+            dict(lap, subsession_id=subsession_id, simsession_number=simsession_number)
+            for simsession_number, simsession_laps in bundle['laps'].items()
+            for lap in simsession_laps
+        ]
+
+    return {'results': results, 'subsessions': subsessions, 'laps': laps}
+
+
+async def _plan(client, args, units):
+    from irslashdata.planner import BulkPlanner, SUBSESSION_SAMPLE
+
+    planner = BulkPlanner(client, max_concurrency=args.concurrency)
+
+    if args.command == 'results':
+        plan = await planner.plan_search([unit for _, unit in units], sample=args.sample)
+    elif args.command == 'laps':
+        plan = await planner.plan_subsession_bundles(
+            [unit for _, unit in units],
+            sample=args.sample if args.sample is not None else SUBSESSION_SAMPLE
+        )
+    else:
+        plan = planner.plan_subsessions([unit for _, unit in units])
+
+    print(plan.summary(concurrency=args.concurrency))
+
+
+async def run(args):
+    from irslashdata.client import Client
+    from irslashdata.concurrency import AdaptiveConcurrency, INITIAL_LIMIT
+
+    if args.command == 'results':
+        units = list(_results_units(args))
+    else:
+        units = [(f"{args.command}:{subsession_id}", subsession_id) for subsession_id in _read_ids(args)]
+
+    if not args.plan:
+        harvest = Harvest(args.output, JobState(args.state), args.concurrency)
+        try:
+            harvest.restore_output()
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 2
+
+    username = os.getenv('IRACING_USERNAME') or input('iRacing username: ')
+    password = os.getenv('IRACING_PASSWORD') or getpass.getpass('iRacing password: ')
+
+    rate_limiter = None
+    if args.rate_limit_file is not None:
+        from irslashdata.ratelimit import RateLimitCoordinator
+        rate_limiter = RateLimitCoordinator(args.rate_limit_file)
+
+    client = Client(
+        username,
+        password,
+        session_file=args.session_file,
+        rate_limiter=rate_limiter,
+        concurrency=AdaptiveConcurrency(initial=min(INITIAL_LIMIT, args.concurrency), maximum=args.concurrency)
+    )
+
+    async with client:
+        if args.plan:
+            await _plan(client, args, units)
+            return 0
+
+        await harvest.run(units, _unit_runners(client)[args.command])
+
+    print(harvest.summary(), file=sys.stderr)
+    return 1 if harvest.failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='irslashdata', description=__doc__.splitlines()[0])
+    parser.add_argument('-o', '--output', default='harvest.jsonl', help='JSON Lines file, or .parquet with pyarrow')
+    parser.add_argument('--state', default=None, help='job-state file, so the job can be resumed')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='units and requests in flight at once')
+    parser.add_argument('--session-file', default=None, help='encrypted session cookie file')
+    parser.add_argument('--rate-limit-file', default=None, help='rate-limit state shared with other workers')
+    parser.add_argument('--plan', action='store_true', help='only estimate the requests and time the job takes')
+    parser.add_argument('--sample', type=int, default=None, help='windows, or subsessions for laps, probed by --plan')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    results = commands.add_parser('results', help='search results for series and seasons')
+    results.add_argument('--series-id', type=int, action='append', required=True)
+    results.add_argument('--season', type=_season, action='append', required=True, help='YEAR:QUARTER')
+    results.add_argument('--race-week', type=int, action='append', help='race_week_num, every week by default')
+
+    for command, help_text in (('subsessions', 'subsession data'), ('laps', 'lap data of every simsession')):
+        ids = commands.add_parser(command, help=f'{help_text} for a list of subsession IDs')
+        ids.add_argument('ids', type=int, nargs='*')
+        ids.add_argument('--ids-file', default=None, help="file with one subsession ID per line, or '-'")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    if args.output.endswith('.parquet') and not args.plan:
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            print("Parquet output requires the pyarrow package.", file=sys.stderr)
+            return 2
+
+    return asyncio.run(run(args))
@@ -1,39 +1,179 @@
-from irslashdata import constants as ct
 from irslashdata import logger
 from irslashdata.helpers import encode_password
 from .exceptions import (
     AuthenticationError, ServerDownError, ForbiddenError,
-    IracingError, BadRequestError, NotFoundError)
+    IracingError, BadRequestError, NotFoundError, DeadlineExceededError)
+from .concurrency import RequestSample
+from .manifest import ChunkManifest, DONE, FAILED
+from .session_store import SessionStore
+from .streaming import JsonArrayParser
 
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime, timezone
 import httpx
 import asyncio
+import functools
 import json
+import os
 
 
 # This module authenticates a session, builds a URL query from parameters,
 # and returns data in easily digestible forms.
-# Cookies are handled by the httpx module behind the scenes and are not
-# written to file.
+# Cookies are handled by the httpx module behind the scenes. They are only
+# written to file when a session_file is given, in which case they are stored
+# encrypted and reloaded by the next Client created with the same file.
 
-# Authentication happens automatically on the first method call from Client().
+# Authentication happens automatically on the first method call from Client(),
+# unless valid cookies were loaded from the session file.
 # When a request fails from an expired cookie, a re-auth is triggered and
 # the last request that failed is tried again.
 
+# Response bodies at least this many bytes long are decoded in the
+# decode_executor, when one is given. json.loads holds the GIL, so only a
+# ProcessPoolExecutor takes the work off the event loop's thread; the decoded
+# result is then unpickled on the loop, which is why a transform that makes
+# it compact should be passed along with large downloads.
+DECODE_THRESHOLD = 1024 * 1024
+
+# Each chunk file is tried this many times, waiting CHUNK_RETRY_DELAY seconds
+# after the first failure and doubling after each further one.
+CHUNK_RETRIES = 3
+CHUNK_RETRY_DELAY = 1.0
+
+# At most this many partial downloads are kept for resuming, the oldest being
+# dropped first.
+MAX_MANIFESTS = 16
+
+
+def _decode_body(content, transform=None):
+    """ Decodes a json body and applies transform to it. Module level so a
+    ProcessPoolExecutor can run it.
+    """
+    data = json.loads(content)
+    return transform(data) if transform is not None else data
+
+
+def with_deadline(method):
+    """ Adds a deadline keyword argument to a Client method: the number of
+    seconds the whole call, including authentication, link and chunk
+    downloads and rate-limit sleeps, may take. When it runs out, whatever is
+    still outstanding is cancelled and DeadlineExceededError is raised.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, deadline: float = None, **kwargs):
+        if deadline is None:
+            return await method(self, *args, **kwargs)
+
+        try:
+            return await asyncio.wait_for(method(self, *args, **kwargs), deadline)
+        except asyncio.TimeoutError:
+            logger.warning(f"{method.__name__}() did not complete within its {deadline} second deadline.")
+            raise DeadlineExceededError(f"{method.__name__}() did not complete within {deadline} seconds.")
+
+    return wrapper
+
 
 class Client:
-    def __init__(self, username: str, password: str):
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        session_file: str = None,
+        rate_limiter=None,
+        decode_executor=None,
+        decode_threshold: int = DECODE_THRESHOLD,
+        scheduler=None,
+        concurrency=None
+    ):
         """ This class is used to interact with all iRacing endpoints that
         have been discovered so far. After creating an instance of Client
         it is required to call authenticate(), due to async limitations.
 
         An alternative to storing credentials as string in the class arguments
         is to store then in your OS environment and call with os.getenv().
+
+        session_file: optional path where the session cookies are persisted,
+        encrypted, between processes. Requires the 'cryptography' package.
+
+        rate_limiter: optional RateLimitCoordinator shared with other Client
+        instances on the same account, so they split one rate-limit budget
+        instead of each tracking x-ratelimit-remaining on its own.
+
+        decode_executor: optional concurrent.futures ProcessPoolExecutor used
+        to decode response bodies of at least decode_threshold bytes, together
+        with any transform passed to search_results() or lap_data(), keeping
+        large chunk files off the event loop. A ThreadPoolExecutor is accepted
+        but helps little, since decoding holds the GIL.
+
+        scheduler: optional PriorityScheduler that every HTTP request waits on,
+        so interactive requests are served ahead of those made inside a
+        request_priority(BULK) block.
+
+        concurrency: optional AdaptiveConcurrency limiting the requests in
+        flight to each host, raised while they stay fast and healthy and
+        lowered on timeouts, 408, 429 and 5xx responses or when the
+        rate-limit budget runs low.
+
+        Client can also be used as an async context manager, which
+        authenticates on entry, or warms up the connection when cookies were
+        loaded, and closes the session on exit:
+
+            async with Client(username, password) as client:
+                ...
         """
         self.username = username
         self.password = encode_password(username, password)
         self.session = httpx.AsyncClient(timeout=10.0)
         self.maintenance_lock = False
+        self.rate_limiter = rate_limiter
+        self.decode_executor = decode_executor
+        self.decode_threshold = decode_threshold
+        self.scheduler = scheduler
+        self.concurrency = concurrency
+        # Requests currently being made by _get_data, by url and parameters.
+        self.in_flight = {}
+        self.in_flight_waiters = {}
+        # Manifests of chunked downloads that failed part way, by request key.
+        self.manifests = {}
+        # The 'limit', 'remaining' and 'reset' rate-limit headers of the last
+        # API response that had them, or None.
+        self.last_rate_limit = None
+
+        self.session_store = None
+        if session_file is not None:
+            self.session_store = SessionStore(session_file, self.password)
+            self.session_store.load(self.session.cookies)
+
+    async def __aenter__(self):
+        if not self.session.cookies.__bool__():
+            await self._authenticate()
+        else:
+            await self._warm_up()
+        return self
+
+    async def _warm_up(self):
+        """ Opens the connection to the members-ng API with one cheap request
+        when cookies were loaded, so the first real call doesn't pay for the
+        TLS handshake. Expired cookies are replaced by the usual 401 re-auth
+        here rather than on that first call. Other failures are ignored.
+        """
+        try:
+            await self._build_request('https://members-ng.iracing.com/data/doc', {})
+        except AuthenticationError:
+            raise
+        except IracingError as exc:
+            logger.info(f"Connection warm-up failed: {exc}")
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """ Saves the session cookies, if a session_file was given, and closes
+        the underlying connections.
+        """
+        if self.session_store is not None and self.session.cookies.__bool__():
+            self.session_store.save(self.session.cookies)
+        await self.session.aclose()
 
     async def _authenticate(self):
         """ Sends a POST request to iRacings login server, initiating a
@@ -90,6 +230,28 @@ class Client:
                 raise IracingError('Login Failed: Unknown error.', response=exc.response)
         else:
             logger.info("Successfully logged into iRacing /data server.")
+            if self.session_store is not None:
+                self.session_store.save(self.session.cookies)
+
+    @asynccontextmanager
+    async def _request_slot(self, url):
+        """ Waits for the concurrency limit for the host of url and then the
+        scheduler, if any, to allow one more request. Yields a RequestSample
+        the response should be stored in.
+
+        The host limit is taken first, so a request held back by a throttled
+        host doesn't occupy a scheduler slot that requests to other hosts, or
+        interactive ones, could use meanwhile.
+        """
+        sample = RequestSample()
+
+        async with AsyncExitStack() as stack:
+            if self.concurrency is not None:
+                await stack.enter_async_context(self.concurrency.slot(url, sample))
+            if self.scheduler is not None:
+                await stack.enter_async_context(self.scheduler.slot())
+                sample.started = asyncio.get_running_loop().time()
+            yield sample
 
     async def _build_request(self, url, params):
         """ Builds the final GET request from url and params
@@ -104,11 +266,13 @@ class Client:
         logger.debug(f'Request being sent to: {url} with params: {json.dumps(params)}')
 
         try:
-            response = await self.session.get(
-                url,
-                params=params,
-                follow_redirects=False
-            )
+            async with self._request_slot(url) as sample:
+                response = await self.session.get(
+                    url,
+                    params=params,
+                    follow_redirects=False
+                )
+                sample.response = response
             logger.info(f"Response: {response.status_code} {response.reason_phrase}")
             response.raise_for_status()
             return response
@@ -162,17 +326,36 @@ class Client:
                 )
             else:
                 try:
-                    response_json = response.json()
+                    response_json = exc.response.json()
                 except json.decoder.JSONDecodeError:
                     response_json = 'Error: response json could not be decoded.'
 
                 logger.warning(
                     'The following unhandled response code was received from the '
-                    'server: ' + str(response.status_code) + "."
-                    'Here is the complete response json: ' + response_json)
+                    'server: ' + str(exc.response.status_code) + "."
+                    'Here is the complete response json: ' + str(response_json))
                 raise IracingError('Request Failed: Unknown error.', response=exc.response)
 
-    async def _get_data(self, url, parameters):
+    async def _decode(self, response, transform=None):
+        """ Decodes the json body of response and applies transform to it, in
+        self.decode_executor if the body is large enough to be worth moving
+        off the event loop.
+        """
+        if self.decode_executor is None or len(response.content) < self.decode_threshold:
+            return _decode_body(response.content, transform)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.decode_executor, _decode_body, response.content, transform)
+
+    async def _get_index(self, url, parameters):
+        """ Sends the first request of a data call, the one answered by the
+        members-ng API itself, applies rate limiting and returns its decoded
+        json. The json either holds the data, a link to it, or chunk_info
+        describing the chunk files it is split into.
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+
         try:
             response_ir = await self._build_request(url, parameters)
         except (ServerDownError, AuthenticationError):
@@ -185,9 +368,20 @@ class Client:
         if response_ir is None:
             return None
 
-        response_ir_json = response_ir.json()
+        response_ir_json = await self._decode(response_ir)
+
+        if self.scheduler is not None:
+            self.scheduler.update(response_ir.headers)
 
-        if 'x-ratelimit-remaining' in response_ir.headers:
+        if all(f'x-ratelimit-{name}' in response_ir.headers for name in ('limit', 'remaining', 'reset')):
+            self.last_rate_limit = {
+                name: int(response_ir.headers[f'x-ratelimit-{name}'])
+                for name in ('limit', 'remaining', 'reset')
+            }
+
+        if self.rate_limiter is not None:
+            await self.rate_limiter.update(response_ir.headers)
+        elif 'x-ratelimit-remaining' in response_ir.headers:
             rate_limit_remaining = response_ir.headers['x-ratelimit-remaining']
             rate_limit_reset = int(response_ir.headers['x-ratelimit-reset'])
             now = datetime.now(timezone.utc).replace(tzinfo=timezone.utc).timestamp()
@@ -199,6 +393,66 @@ class Client:
                 logger.info(f"Approaching rate limit. Sleeping http requests for {time_to_reset} seconds")
                 await asyncio.sleep(time_to_reset)
 
+        return response_ir_json
+
+    def _request_key(self, url, parameters, transform=None):
+        key = url + '?' + json.dumps(parameters, sort_keys=True, default=str)
+        if transform is not None:
+            key += '#' + repr(transform)
+        return key
+
+    async def _get_data(self, url, parameters, transform=None):
+        """ Returns the data for url and parameters. Concurrent calls with the
+        same url and parameters share a single in-flight request and all
+        receive its result, so callers must not modify what is returned.
+        transform is applied to the records of each chunk file.
+        """
+        return await self._single_flight(
+            self._request_key(url, parameters, transform),
+            lambda: self._fetch_data(url, parameters, transform)
+        )
+
+    async def _single_flight(self, key, fetch):
+        """ Awaits fetch() for key, unless a call for the same key is already
+        in flight, in which case its result is shared instead.
+        """
+        if key in self.in_flight:
+            logger.debug(f'Joining in-flight request: {key}')
+        else:
+            task = asyncio.ensure_future(fetch())
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+            self.in_flight[key] = task
+
+        task = self.in_flight[key]
+        self.in_flight_waiters[key] = self.in_flight_waiters.get(key, 0) + 1
+
+        # Shielded so that one caller being cancelled, for example by its
+        # deadline, doesn't cancel the request for the others. The request
+        # is only cancelled once every caller waiting on it has gone.
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self.in_flight_waiters[key] == 1 and not task.done():
+                logger.debug(f'Cancelling abandoned request: {key}')
+                task.cancel()
+            raise
+        finally:
+            self.in_flight_waiters[key] -= 1
+            if self.in_flight_waiters[key] == 0:
+                del self.in_flight_waiters[key]
+
+    async def _fetch_data(self, url, parameters, transform=None):
+        key = self._request_key(url, parameters, transform)
+        manifest = self._resumable_manifest(key)
+
+        if manifest is not None:
+            return await self._fetch_chunks(key, manifest, transform)
+
+        response_ir_json = await self._get_index(url, parameters)
+
+        if response_ir_json is None:
+            return None
+
         data = []
 
         if 'link' in response_ir_json:
@@ -212,33 +466,334 @@ class Client:
             if response_amazon is None:
                 return None
 
-            response_amazon_json = response_amazon.json()
+            response_amazon_json = await self._decode(response_amazon)
 
             if isinstance(response_amazon_json, list):
                 data = response_amazon_json
             else:
-                data.append(response_amazon.json())
+                data.append(response_amazon_json)
         elif 'data' in response_ir_json and 'chunk_info' in response_ir_json['data']:
             chunk_info_dict = response_ir_json['data']['chunk_info']
 
             if 'chunk_file_names' in chunk_info_dict and 'base_download_url' in chunk_info_dict:
-                for chunk_filename in chunk_info_dict['chunk_file_names']:
-                    chunk_url = chunk_info_dict['base_download_url'] + chunk_filename
-
-                    try:
-                        response_amazon = await self._build_request(chunk_url, {})
-                    except (ServerDownError, AuthenticationError):
-                        raise
-                    except IracingError:
-                        return None
-
-                    for item in response_amazon.json():
-                        data.append(item)
+                return await self._fetch_chunks(key, ChunkManifest(chunk_info_dict), transform)
         else:
             data = response_ir_json
 
         return data
 
+    def _resumable_manifest(self, key):
+        """ Returns the manifest of a partial download for key, if there is
+        one and its signed chunk URLs should still be valid.
+        """
+        manifest = self.manifests.get(key)
+
+        if manifest is not None and manifest.is_expired():
+            logger.info("Discarding a partial download whose chunk URLs have expired.")
+            del self.manifests[key]
+            return None
+
+        return manifest
+
+    def _keep_manifest(self, key, manifest):
+        """ Keeps the manifest of a partial download under key, dropping
+        manifests whose chunk URLs have expired and, beyond MAX_MANIFESTS,
+        the oldest, so chunks nobody asks for again aren't held forever.
+        """
+        self.manifests.pop(key, None)
+
+        for expired_key in [other for other, kept in self.manifests.items() if kept.is_expired()]:
+            del self.manifests[expired_key]
+
+        while len(self.manifests) >= MAX_MANIFESTS:
+            oldest_key = min(self.manifests, key=lambda other: self.manifests[other].created_at)
+            del self.manifests[oldest_key]
+
+        self.manifests[key] = manifest
+
+    async def _retry_chunk(self, fetch, chunk_url):
+        """ Awaits fetch(chunk_url), retrying it up to CHUNK_RETRIES times in
+        total with exponential backoff. A chunk that is forbidden or not found
+        isn't retried, since asking again won't change the answer.
+        """
+        for attempt in range(CHUNK_RETRIES):
+            try:
+                return await fetch(chunk_url)
+            except (ServerDownError, AuthenticationError, ForbiddenError, NotFoundError):
+                raise
+            except IracingError:
+                if attempt + 1 == CHUNK_RETRIES:
+                    raise
+
+                delay = CHUNK_RETRY_DELAY * 2 ** attempt
+                logger.info(f"Retrying chunk {chunk_url} in {delay} seconds.")
+                await asyncio.sleep(delay)
+
+    def _check_chunk_response(self, response, chunk_url):
+        """ Raises for an unsuccessful response to a chunk file request.
+        Chunk files are served by S3 rather than the /data API, so its status
+        codes mean something else: 403 is an expired signed URL and raises
+        ForbiddenError, 404 raises NotFoundError, and anything else, such as a
+        5xx or 429, raises IracingError, which _retry_chunk() retries.
+        """
+        if response.is_success:
+            return
+
+        status_code = response.status_code
+        logger.warning(f"{status_code} when downloading chunk {chunk_url}.")
+
+        if status_code == 403:
+            raise ForbiddenError(
+                f"403 when downloading chunk {chunk_url}. The chunk URL has likely expired.",
+                response=response
+            )
+        if status_code == 404:
+            raise NotFoundError(f"404 when downloading chunk {chunk_url}.", response=response)
+
+        raise IracingError(f"{status_code} when downloading chunk {chunk_url}.", response=response)
+
+    async def _fetch_chunk(self, chunk_url, transform=None):
+        """ Downloads and decodes one chunk file.
+        """
+        try:
+            async with self._request_slot(chunk_url) as sample:
+                response = await self.session.get(chunk_url, follow_redirects=False)
+                sample.response = response
+        except httpx.TimeoutException as exc:
+            logger.warning(f"httpx.TimeoutException occured for {exc.request.url} - {exc}.")
+            raise IracingError(f"httpx.TimeoutException occured for {exc.request.url} - {exc}.")
+        except httpx.RequestError as exc:
+            logger.warning(f"httpx.RequestError occured for {exc.request.url} - {exc}.")
+            raise BadRequestError(f"Bad request. URL: {exc.request.url}", exc.request)
+
+        self._check_chunk_response(response, chunk_url)
+        return await self._decode(response, transform)
+
+    async def _fetch_chunks(self, key, manifest, transform=None):
+        """ Downloads the chunks of manifest that aren't done yet and returns
+        the records of every chunk, in order. If a chunk still fails after
+        its retries, or the call is cancelled, the manifest and the chunks
+        already downloaded are kept under key so the next identical call
+        resumes from there. Returns None on failure.
+        """
+        try:
+            for chunk_filename in manifest.pending():
+                manifest.records[chunk_filename] = await self._retry_chunk(
+                    lambda chunk_url: self._fetch_chunk(chunk_url, transform),
+                    manifest.chunk_url(chunk_filename)
+                )
+                manifest.status[chunk_filename] = DONE
+        except (ForbiddenError, NotFoundError):
+            # Most likely the signed chunk URLs have expired. Start over next time.
+            self.manifests.pop(key, None)
+            return None
+        except IracingError as exc:
+            manifest.status[chunk_filename] = FAILED
+            self._keep_manifest(key, manifest)
+            if isinstance(exc, (ServerDownError, AuthenticationError)):
+                raise
+
+            logger.warning(
+                f"Chunk {chunk_filename} failed. Keeping "
+                f"{len(manifest.chunk_file_names) - len(manifest.pending())} of "
+                f"{len(manifest.chunk_file_names)} chunks for the next attempt."
+            )
+            return None
+        except asyncio.CancelledError:
+            self._keep_manifest(key, manifest)
+            raise
+
+        self.manifests.pop(key, None)
+        data = []
+
+        for chunk_filename in manifest.chunk_file_names:
+            if manifest.records[chunk_filename]:
+                data += manifest.records[chunk_filename]
+
+        return data
+
+    async def _get_chunk_info(self, url, parameters):
+        """ Returns the chunk_info dict for a chunked data call without
+        downloading any chunk, following the link first if there is one.
+        Returns None if the data isn't chunked or couldn't be retrieved.
+        """
+        response_ir_json = await self._get_index(url, parameters)
+
+        if response_ir_json is None:
+            return None
+
+        if 'link' in response_ir_json:
+            try:
+                response_amazon = await self._build_request(response_ir_json['link'], {})
+            except (ServerDownError, AuthenticationError):
+                raise
+            except IracingError:
+                return None
+
+            response_ir_json = await self._decode(response_amazon)
+
+        if isinstance(response_ir_json, dict):
+            if 'data' in response_ir_json and 'chunk_info' in response_ir_json['data']:
+                chunk_info_dict = response_ir_json['data']['chunk_info']
+            else:
+                chunk_info_dict = response_ir_json.get('chunk_info')
+
+            if (
+                chunk_info_dict is not None
+                and 'chunk_file_names' in chunk_info_dict
+                and 'base_download_url' in chunk_info_dict
+            ):
+                return chunk_info_dict
+
+        return None
+
+    async def _stream_to_file(self, url, path):
+        """ Streams the body of a GET request for url straight into the file
+        at path, without decoding it. The file only appears once the body has
+        been fully received.
+        """
+        temp_path = path + '.part'
+
+        try:
+            async with self._request_slot(url) as sample:
+                async with self.session.stream('GET', url, follow_redirects=False) as response:
+                    sample.response = response
+                    self._check_chunk_response(response, url)
+                    with open(temp_path, 'wb') as chunk_file:
+                        async for block in response.aiter_bytes():
+                            chunk_file.write(block)
+        except httpx.TimeoutException as exc:
+            logger.warning(f"httpx.TimeoutException occured for {exc.request.url} - {exc}.")
+            raise IracingError(f"httpx.TimeoutException occured for {exc.request.url} - {exc}.")
+        except httpx.RequestError as exc:
+            logger.warning(f"httpx.RequestError occured for {exc.request.url} - {exc}.")
+            raise BadRequestError(f"Bad request. URL: {exc.request.url}", exc.request)
+
+        os.replace(temp_path, path)
+
+    async def chunk_size(self, chunk_url):
+        """ Returns the size in bytes of the chunk file at chunk_url, from a
+        ranged GET for its first byte, since the signed chunk URLs only allow
+        GET. Returns None if the size couldn't be read.
+        """
+        try:
+            async with self._request_slot(chunk_url) as sample:
+                async with self.session.stream(
+                    'GET', chunk_url, headers={'Range': 'bytes=0-0'}, follow_redirects=False
+                ) as response:
+                    sample.response = response
+        except httpx.HTTPError as exc:
+            logger.warning(f"Could not size chunk {chunk_url}: {exc}")
+            return None
+
+        if response.status_code == 206 and '/' in response.headers.get('content-range', ''):
+            total = response.headers['content-range'].rsplit('/', 1)[1]
+            if total.isdigit():
+                return int(total)
+
+        if response.status_code == 200 and 'content-length' in response.headers:
+            # The range was ignored; the body was not read.
+            return int(response.headers['content-length'])
+
+        logger.warning(f"Could not size chunk {chunk_url}: status {response.status_code}.")
+        return None
+
+    async def _stream_chunk_records(self, chunk_url):
+        """ Async generator yielding the records of one chunk file as they
+        are decoded from the incoming bytes. It doesn't wait on the
+        scheduler or concurrency limit, since the caller may make other
+        requests while the generator is suspended.
+        """
+        parser = JsonArrayParser()
+
+        try:
+            async with self.session.stream('GET', chunk_url, follow_redirects=False) as response:
+                self._check_chunk_response(response, chunk_url)
+                async for block in response.aiter_bytes():
+                    for record in parser.feed(block):
+                        yield record
+        except httpx.TimeoutException as exc:
+            logger.warning(f"httpx.TimeoutException occured for {exc.request.url} - {exc}.")
+            raise IracingError(f"httpx.TimeoutException occured for {exc.request.url} - {exc}.")
+        except httpx.RequestError as exc:
+            logger.warning(f"httpx.RequestError occured for {exc.request.url} - {exc}.")
+            raise BadRequestError(f"Bad request. URL: {exc.request.url}", exc.request)
+
+        try:
+            remaining_records = parser.close()
+        except ValueError as exc:
+            logger.warning(f"Chunk {chunk_url} could not be decoded: {exc}")
+            raise IracingError(f"Chunk {chunk_url} could not be decoded.")
+
+        for record in remaining_records:
+            yield record
+
+    async def _stream_chunks(self, url, parameters):
+        """ Returns an async generator over the records of every chunk of a
+        chunked data call. Raises IracingError if the chunk_info couldn't be
+        retrieved, so that isn't mistaken for data without records.
+        """
+        chunk_info_dict = await self._get_chunk_info(url, parameters)
+
+        if chunk_info_dict is None:
+            logger.warning(f"No chunk_info could be retrieved for {url} with {parameters}.")
+            raise IracingError(f"No chunk_info could be retrieved for {url}.")
+
+        return self._iter_chunks(chunk_info_dict)
+
+    async def _iter_chunks(self, chunk_info_dict):
+        """ Async generator yielding the records of every chunk in
+        chunk_info_dict, in order, while they stream in.
+        """
+        for chunk_filename in chunk_info_dict['chunk_file_names']:
+            async for record in self._stream_chunk_records(chunk_info_dict['base_download_url'] + chunk_filename):
+                yield record
+
+    async def _store_chunks(self, url, parameters, store):
+        """ Downloads every chunk file of a chunked data call into store,
+        skipping chunks it already holds. Progress is recorded in a manifest
+        saved in the store, so an interrupted download is resumed without
+        asking the API again while the chunk URLs are still valid. Returns
+        the list of chunk file paths, or None if the chunk_info couldn't be
+        retrieved or a chunk failed to download.
+        """
+        manifest_path = store.manifest_path(self._request_key(url, parameters))
+        manifest = ChunkManifest.load(manifest_path)
+
+        if manifest is None or manifest.is_expired():
+            chunk_info_dict = await self._get_chunk_info(url, parameters)
+
+            if chunk_info_dict is None:
+                logger.warning(f"No chunk_info could be retrieved for {url} with {parameters}.")
+                return None
+
+            manifest = ChunkManifest(chunk_info_dict)
+        else:
+            logger.info(f"Resuming download of {len(manifest.pending())} chunks from {manifest_path}.")
+
+        for chunk_filename in manifest.pending():
+            path = store.path_for(chunk_filename)
+
+            if not store.has(chunk_filename):
+                try:
+                    await self._retry_chunk(
+                        lambda chunk_url: self._stream_to_file(chunk_url, path),
+                        manifest.chunk_url(chunk_filename)
+                    )
+                except IracingError as exc:
+                    manifest.status[chunk_filename] = FAILED
+                    manifest.save(manifest_path)
+                    if isinstance(exc, (ServerDownError, AuthenticationError)):
+                        raise
+                    logger.warning(f"Chunk {chunk_filename} could not be stored: {exc}")
+                    return None
+
+            manifest.status[chunk_filename] = DONE
+            manifest.save(manifest_path)
+
+        return [store.path_for(chunk_filename) for chunk_filename in manifest.chunk_file_names]
+
+    @with_deadline
     async def search_results(
         self,
         season_year=None,
@@ -253,12 +808,40 @@ class Client:
         race_week_num=None,
         official_only=None,
         event_types=[2, 3, 4, 5],
-        category_ids=[1, 2, 3, 4, 5, 6]
+        category_ids=[1, 2, 3, 4, 5, 6],
+        store=None,
+        stream=False,
+        plan=False,
+        raise_errors=False,
+        transform=None
     ):
         """ Returns a list with a SearchResults object for each of a driver's
         past events that meet the selected criteria. You must provide either a year
         and quarter or a time range with starttime_low and starttime_high. Default
         is to return results from race events in any category and any series.
+        If the search fails an empty list is returned, unless raise_errors is
+        True, in which case IracingError is raised so a failure can be told
+        apart from a search without results.
+
+        transform, if given, is called with the list of records of each chunk
+        file and must return a list, for example a RecordTuples. It runs in
+        the decode_executor along with decoding, so large results come back
+        to the event loop in a compact form. It must be picklable for a
+        ProcessPoolExecutor.
+
+        If a ChunkStore is passed as store, the raw chunk files are streamed
+        into it without being decoded and the list of their paths is returned
+        instead, or None if the download failed. Chunks already stored are
+        kept and the download resumes from them on the next call.
+
+        If stream is True, an async generator is returned instead, which
+        yields each record as soon as it has been decoded from the incoming
+        chunk bytes. IracingError is raised if the chunk_info can't be
+        retrieved, and from the generator if a chunk fails part way.
+
+        If plan is True, only the chunk_info is retrieved and returned, without
+        downloading any chunk, or None if the data isn't chunked. Used by
+        BulkPlanner to size a job before running it.
         """
         parameters = {}
 
@@ -302,17 +885,33 @@ class Client:
                 "You must either supply season_year and season_quarter, start_range_begin, or finish_range_begin."
             )
         url = 'https://members-ng.iracing.com/data/results/search_series'
+
+        if plan:
+            return await self._get_chunk_info(url, parameters)
+
+        if store is not None:
+            return await self._store_chunks(url, parameters, store)
+
+        if stream:
+            return await self._stream_chunks(url, parameters)
+
         try:
-            results = await self._get_data(url, parameters)
-            if results is None:
-                results = []
+            results = await self._get_data(url, parameters, transform)
         except (AuthenticationError, ServerDownError):
             raise
         except IracingError:
+            if raise_errors:
+                raise
+            results = None
+
+        if results is None:
+            if raise_errors:
+                raise IracingError(f"search_results() failed for {parameters}.")
             results = []
 
         return results
 
+    @with_deadline
     async def search_hosted(
         self,
         start_range_begin=None,
@@ -393,14 +992,37 @@ class Client:
 
         return results
 
+    @with_deadline
     async def lap_data(
         self,
         subsession_id: int,
-        simsession_number: int
+        simsession_number: int,
+        store=None,
+        stream=False,
+        plan=False,
+        transform=None
     ):
         """ Returns a list of dicts of lap data. You must provide cust_id for
         single-driver events, and it's optional for team events. You must
-        provide team_id for team events.
+        provide team_id for team events. Returns None if the lap data
+        couldn't be retrieved.
+
+        transform is applied to the records of each chunk file, as in
+        search_results().
+
+        If a ChunkStore is passed as store, the raw chunk files are streamed
+        into it without being decoded and the list of their paths is returned
+        instead, or None if the download failed. Chunks already stored are
+        kept and the download resumes from them on the next call.
+
+        If stream is True, an async generator is returned instead, which
+        yields each record as soon as it has been decoded from the incoming
+        chunk bytes. IracingError is raised if the chunk_info can't be
+        retrieved, and from the generator if a chunk fails part way.
+
+        If plan is True, only the chunk_info is retrieved and returned, without
+        downloading any chunk, or None if the data isn't chunked. Used by
+        BulkPlanner to size a job before running it.
         """
 
         parameters = {
@@ -410,46 +1032,63 @@ class Client:
 
         url = "https://members-ng.iracing.com/data/results/lap_chart_data"
 
-        try:
-            lap_data_summary_dicts = await self._get_data(url, parameters)
+        if plan:
+            return await self._get_chunk_info(url, parameters)
 
-            if lap_data_summary_dicts is None or len(lap_data_summary_dicts) < 1:
-                return []
-            else:
-                if len(lap_data_summary_dicts) > 1:
-                    logger.warning("More than one summary dict returned. Ignoring the extras.")
-
-                lap_data_summary_dict = lap_data_summary_dicts[0]
-
-                if (
-                    ('success' in lap_data_summary_dict and lap_data_summary_dict['success'] is True)
-                    and 'chunk_info' in lap_data_summary_dict
-                    and 'base_download_url' in lap_data_summary_dict['chunk_info']
-                    and 'chunk_file_names' in lap_data_summary_dict['chunk_info']
-                ):
-                    total_data = []
-                    chunk_info_dict = lap_data_summary_dict['chunk_info']
-                    for chunk_filename in chunk_info_dict['chunk_file_names']:
-                        chunk_url = chunk_info_dict['base_download_url'] + chunk_filename
-
-                        try:
-                            response_ir = await self._build_request(chunk_url, {})
-                        except (ServerDownError, AuthenticationError):
-                            raise
-                        except IracingError:
-                            return None
-
-                        response_ir_json = response_ir.json()
-
-                        if response_ir_json is not None and len(response_ir_json) > 0:
-                            total_data += response_ir_json
-                    return total_data
+        if store is not None:
+            return await self._store_chunks(url, parameters, store)
+
+        if stream:
+            return await self._stream_chunks(url, parameters)
+
+        return await self._lap_data(url, parameters, transform)
+
+    async def _lap_data(self, url, parameters, transform=None):
+        """ Returns the lap data of one simsession, or None if it couldn't be
+        retrieved, so that failures can be told apart from simsessions
+        without laps. Concurrent calls for the same simsession share the
+        whole chain of summary, link and chunk requests.
+        """
+        # Kept apart from the key _get_data uses for the summary request.
+        key = 'lap_data:' + self._request_key(url, parameters, transform)
+        return await self._single_flight(key, lambda: self._fetch_lap_data(key, url, parameters, transform))
+
+    async def _fetch_lap_data(self, key, url, parameters, transform):
+        manifest = self._resumable_manifest(key)
 
+        if manifest is not None:
+            return await self._fetch_chunks(key, manifest, transform)
+
+        try:
+            lap_data_summary_dicts = await self._get_data(url, parameters)
         except (AuthenticationError, ServerDownError):
             raise
         except IracingError:
+            return None
+
+        if lap_data_summary_dicts is None:
+            return None
+
+        if len(lap_data_summary_dicts) < 1:
             return []
 
+        if len(lap_data_summary_dicts) > 1:
+            logger.warning("More than one summary dict returned. Ignoring the extras.")
+
+        lap_data_summary_dict = lap_data_summary_dicts[0]
+
+        if (
+            ('success' in lap_data_summary_dict and lap_data_summary_dict['success'] is True)
+            and 'chunk_info' in lap_data_summary_dict
+            and 'base_download_url' in lap_data_summary_dict['chunk_info']
+            and 'chunk_file_names' in lap_data_summary_dict['chunk_info']
+        ):
+            return await self._fetch_chunks(key, ChunkManifest(lap_data_summary_dict['chunk_info']), transform)
+
+        logger.warning(f"No lap data chunks in the summary for {parameters}.")
+        return None
+
+    @with_deadline
     async def stats_series(self):
         """ Returns a list of dicts containing data about each series ever run in iRacing.
         """
@@ -466,6 +1105,7 @@ class Client:
 
         return results
 
+    @with_deadline
     async def current_race_week(
         self,
         series_id
@@ -512,6 +1152,7 @@ class Client:
 
         return (None, None, None, None, None)
 
+    @with_deadline
     async def subsession_data(
         self,
         subsession_id
@@ -542,6 +1183,47 @@ class Client:
 
         return results[0]
 
+    @with_deadline
+    async def subsession_bundle(
+        self,
+        subsession_id
+    ):
+        """ Returns a dict with the subsession_data() of subsession_id under
+        'subsession' and the lap_data() of every simsession in it under
+        'laps', keyed by simsession_number. The lap data of all simsessions
+        is downloaded concurrently. A simsession whose lap data couldn't be
+        retrieved has None under 'laps' and its number in the 'failed' list,
+        while one without laps has an empty list. Returns None if the
+        subsession data could not be retrieved.
+        """
+        subsession = await self.subsession_data(subsession_id)
+
+        if subsession is None:
+            return None
+
+        simsession_numbers = [
+            session_result['simsession_number']
+            for session_result in subsession.get('session_results', [])
+            if 'simsession_number' in session_result
+        ]
+
+        url = "https://members-ng.iracing.com/data/results/lap_chart_data"
+        laps = await asyncio.gather(*[
+            self._lap_data(url, {'subsession_id': subsession_id, 'simsession_number': simsession_number})
+            for simsession_number in simsession_numbers
+        ])
+
+        return {
+            'subsession': subsession,
+            'laps': dict(zip(simsession_numbers, laps)),
+            'failed': [
+                simsession_number
+                for simsession_number, simsession_laps in zip(simsession_numbers, laps)
+                if simsession_laps is None
+            ]
+        }
+
+    @with_deadline
     async def get_member_info(
         self,
         cust_ids: list
@@ -573,6 +1255,7 @@ class Client:
 
         return results[0]['members']
 
+    @with_deadline
     async def lookup_drivers(
         self,
         search_string: str,
@@ -594,6 +1277,7 @@ class Client:
 
         return results
 
+    @with_deadline
     async def current_seasons(
             self,
             include_series: bool = True
@@ -622,6 +1306,7 @@ class Client:
 
         return results
 
+    @with_deadline
     async def current_car_classes(
         self
     ):
@@ -644,6 +1329,7 @@ class Client:
 
         return results
 
+    @with_deadline
     async def chart_data(
         self,
         cust_id,
@@ -678,6 +1364,7 @@ class Client:
 
         return results[0]['data']
 
+    @with_deadline
     async def race_guide(
         self,
         from_time: str = None,
@@ -714,6 +1401,7 @@ class Client:
 
         return response[0]
 
+    @with_deadline
     async def track_get(
         self,
     ):
@@ -732,3 +1420,23 @@ class Client:
             return None
 
         return response
+
+    @with_deadline
+    async def car_get(
+        self,
+    ):
+        parameters = {}
+
+        url = 'https://members-ng.iracing.com/data/car/get'
+
+        try:
+            response = await self._get_data(url, parameters)
+        except (AuthenticationError, ServerDownError):
+            raise
+        except IracingError:
+            return None
+
+        if response is None or len(response) < 1:
+            return None
+
+        return response
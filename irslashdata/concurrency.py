@@ -0,0 +1,168 @@
+from irslashdata import logger
+
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+import asyncio
+
+
+# This module adapts how many requests a Client keeps in flight to each host,
+# using additive increase / multiplicative decrease (AIMD). While requests
+# succeed with steady latency the limit grows by about one per round of
+# requests. Timeouts, 408, 429 and 5xx responses, or a pace that would spend
+# the remaining rate-limit budget before the window resets, halve it.
+
+# Limits are kept per host, so the members-ng API and the S3 host serving the
+# chunk files are tuned independently.
+
+INITIAL_LIMIT = 4
+MINIMUM_LIMIT = 1
+MAXIMUM_LIMIT = 32
+DECREASE_FACTOR = 0.5
+# Latency above this multiple of the lowest latency seen stops increases.
+LATENCY_TOLERANCE = 2.0
+# Congestion signals within this many seconds of a decrease are treated as
+# the same event.
+DECREASE_COOLDOWN = 1.0
+CONGESTION_STATUS_CODES = (408, 429)
+
+
+class RequestSample:
+    """ Filled in by the caller with the response of the request it made while
+    holding a slot, so the limiter can judge the outcome. started is the
+    loop time the request was sent at, if the caller waited on anything else
+    after taking the slot, so that wait isn't counted as latency.
+    """
+    __slots__ = ('response', 'started')
+
+    def __init__(self):
+        self.response = None
+        self.started = None
+
+
+class AIMDLimit:
+    def __init__(self, host, initial=INITIAL_LIMIT, minimum=MINIMUM_LIMIT, maximum=MAXIMUM_LIMIT):
+        self.host = host
+        self.limit = float(max(minimum, min(maximum, initial)))
+        self.minimum = minimum
+        self.maximum = maximum
+
+        self.in_flight = 0
+        self.waiters = deque()
+        self.min_latency = None
+        self.latency = None
+        self.last_decrease = None
+
+    def _wake(self):
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self.waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def increase(self, latency):
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+
+        if latency > LATENCY_TOLERANCE * self.min_latency:
+            return
+
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self._wake()
+
+    def decrease(self, reason):
+        now = asyncio.get_running_loop().time()
+        if self.last_decrease is not None and now - self.last_decrease < DECREASE_COOLDOWN:
+            return
+
+        self.last_decrease = now
+        self.limit = max(self.minimum, self.limit * DECREASE_FACTOR)
+        logger.info(f"Reducing concurrency for {self.host} to {int(self.limit)} ({reason}).")
+
+    def over_budget(self, headers):
+        """ True if requests at the current limit and latency would use up the
+        remaining rate-limit budget before the window resets.
+        """
+        if 'x-ratelimit-remaining' not in headers or 'x-ratelimit-reset' not in headers or not self.latency:
+            return False
+
+        remaining = int(headers['x-ratelimit-remaining'])
+        time_to_reset = int(headers['x-ratelimit-reset']) - datetime.now(timezone.utc).timestamp()
+        if time_to_reset <= 0:
+            return False
+
+        return self.limit / self.latency > remaining / time_to_reset
+
+
+class AdaptiveConcurrency:
+    def __init__(self, initial: int = INITIAL_LIMIT, minimum: int = MINIMUM_LIMIT, maximum: int = MAXIMUM_LIMIT):
+        """ Holds an AIMDLimit for every host requests are made to. Pass an
+        instance to Client(concurrency=...).
+        """
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.hosts = {}
+
+    def limit_for(self, url):
+        host = urlsplit(str(url)).hostname
+        if host not in self.hosts:
+            self.hosts[host] = AIMDLimit(host, self.initial, self.minimum, self.maximum)
+        return self.hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url, sample):
+        """ Holds one of the in-flight slots for the host of url during the
+        with block, then adjusts the host's limit from the time taken and
+        either the exception raised or sample.response.
+        """
+        limit = self.limit_for(url)
+        await limit.acquire()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        try:
+            yield
+        except Exception as exc:
+            # An HTTPStatusError carries its response; judge it by status.
+            response = getattr(exc, 'response', None)
+            if response is None:
+                limit.decrease(type(exc).__name__)
+            else:
+                self._observe(limit, response, loop.time() - (sample.started or started))
+            raise
+        else:
+            if sample.response is not None:
+                self._observe(limit, sample.response, loop.time() - (sample.started or started))
+        finally:
+            limit.release()
+
+    def _observe(self, limit, response, latency):
+        if response.status_code in CONGESTION_STATUS_CODES or response.status_code >= 500:
+            limit.decrease(f"status {response.status_code}")
+            return
+
+        limit.increase(latency)
+        if limit.over_budget(response.headers):
+            limit.decrease("rate limit budget")
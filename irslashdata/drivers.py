@@ -0,0 +1,194 @@
+from irslashdata import logger
+
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+
+
+# This module keeps a local index of every driver seen through lookup_drivers,
+# get_member_info and results payloads, so that name autocomplete can be
+# answered from memory and only falls back to the API when there are too few
+# local matches.
+
+# Names are indexed by the full display name and by each word in it, so
+# 'verst' finds 'Max Verstappen'. cust_ids are indexed as strings, so a
+# numeric prefix finds drivers by ID.
+
+# Individual member records from get_member_info are cached for MEMBER_TTL
+# seconds. Misses, both member IDs that returned nothing and search strings
+# the API had no drivers for, are remembered for NEGATIVE_TTL seconds.
+MEMBER_TTL = 60 * 60
+NEGATIVE_TTL = 10 * 60
+
+
+def _now():
+    return datetime.now(timezone.utc).timestamp()
+
+
+def _normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+def _keys(display_name, cust_id):
+    name = _normalize(display_name)
+    keys = {name, str(cust_id)}
+    keys.update(name.split(' '))
+    return keys
+
+
+class DriverIndex:
+    def __init__(self, member_ttl: float = MEMBER_TTL, negative_ttl: float = NEGATIVE_TTL):
+        self.member_ttl = member_ttl
+        self.negative_ttl = negative_ttl
+
+        # Sorted list of (key, cust_id) searched by prefix.
+        self.entries = []
+        # cust_id: display_name currently indexed for that driver
+        self.names = {}
+        # cust_id: (fetched_at, member dict from get_member_info)
+        self.members = {}
+        # cust_id: time get_member_info returned nothing for it
+        self.missing_members = {}
+        # normalized search string: time lookup_drivers returned nothing for it
+        self.missing_searches = {}
+
+    def add(self, cust_id, display_name):
+        """ Indexes one driver, replacing the entries for a previous name.
+        """
+        previous_name = self.names.get(cust_id)
+        if previous_name == display_name:
+            return
+
+        if previous_name is not None:
+            for key in _keys(previous_name, cust_id):
+                position = bisect_left(self.entries, (key, cust_id))
+                if position < len(self.entries) and self.entries[position] == (key, cust_id):
+                    del self.entries[position]
+
+        for key in _keys(display_name, cust_id):
+            insort(self.entries, (key, cust_id))
+        self.names[cust_id] = display_name
+
+    def add_records(self, records):
+        """ Indexes every dict carrying both cust_id and display_name found in
+        records, which may be a lookup_drivers or get_member_info result, a
+        list of results rows or a subsession_data payload, at any depth.
+        Returns the number of drivers seen.
+        """
+        seen = 0
+        pending = [records]
+
+        while pending:
+            item = pending.pop()
+            if isinstance(item, dict):
+                if 'cust_id' in item and 'display_name' in item:
+                    self.add(item['cust_id'], item['display_name'])
+                    seen += 1
+                pending.extend(value for value in item.values() if isinstance(value, (dict, list)))
+            elif isinstance(item, list):
+                pending.extend(value for value in item if isinstance(value, (dict, list)))
+
+        return seen
+
+    def search(self, prefix, limit: int = 10):
+        """ Returns up to limit (cust_id, display_name) tuples for drivers with
+        a name, a word in their name or a cust_id starting with prefix.
+        """
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+
+        matches = []
+        seen = set()
+        position = bisect_left(self.entries, (prefix,))
+
+        while position < len(self.entries) and len(matches) < limit:
+            key, cust_id = self.entries[position]
+            if not key.startswith(prefix):
+                break
+            if cust_id not in seen:
+                seen.add(cust_id)
+                matches.append((cust_id, self.names[cust_id]))
+            position += 1
+
+        return matches
+
+    def _known_missing(self, search_string):
+        """ True if the API recently had no drivers for search_string or for
+        any prefix of it, since a longer string can't match more drivers.
+        """
+        now = _now()
+        for length in range(1, len(search_string) + 1):
+            missed_at = self.missing_searches.get(search_string[:length])
+            if missed_at is not None and now - missed_at < self.negative_ttl:
+                return True
+        return False
+
+    async def lookup(self, client, search_string, limit: int = 10, min_results: int = 5):
+        """ Returns up to limit (cust_id, display_name) matches for
+        search_string. The API is only asked, through lookup_drivers(), when
+        fewer than min_results drivers match locally.
+        """
+        matches = self.search(search_string, limit)
+        normalized = _normalize(search_string)
+
+        if len(matches) >= min(min_results, limit) or not normalized or self._known_missing(normalized):
+            return matches
+
+        results = await client.lookup_drivers(search_string)
+
+        if results is None:
+            logger.info(f"No lookup results returned for {search_string!r}.")
+            # Not remembered as missing: the request itself may have failed.
+            return matches
+
+        if not results:
+            self.missing_searches[normalized] = _now()
+            return matches
+
+        self.add_records(results)
+        return self.search(search_string, limit)
+
+    async def get_members(self, client, cust_ids):
+        """ Returns {cust_id: member dict} for cust_ids, fetching only those
+        without a fresh cached record, in a single get_member_info() call.
+        cust_ids the API recently returned nothing for are left out.
+        """
+        now = _now()
+        found = {}
+        to_fetch = []
+
+        for cust_id in cust_ids:
+            if cust_id in self.members and now - self.members[cust_id][0] < self.member_ttl:
+                found[cust_id] = self.members[cust_id][1]
+            elif cust_id in self.missing_members and now - self.missing_members[cust_id] < self.negative_ttl:
+                continue
+            else:
+                to_fetch.append(cust_id)
+
+        if not to_fetch:
+            return found
+
+        members = await client.get_member_info(to_fetch)
+        if members is None:
+            logger.info(f"No member info returned for {len(to_fetch)} cust_ids.")
+            # Not remembered as missing: the request itself may have failed.
+            return found
+
+        for member in members:
+            if 'cust_id' in member:
+                self.members[member['cust_id']] = (now, member)
+                found[member['cust_id']] = member
+
+        self.add_records(members)
+
+        for cust_id in to_fetch:
+            if cust_id not in found:
+                self.missing_members[cust_id] = now
+
+        return found
+
+    async def get_member(self, client, cust_id):
+        """ Returns the member dict for cust_id, or None.
+        """
+        members = await self.get_members(client, [cust_id])
+        return members.get(cust_id)
@@ -40,3 +40,10 @@ class BadRequestError(IracingError):
     def __init__(self, message, request, response=None):
         self.request = request
         super(BadRequestError, self).__init__(message, response=response)
+
+
+class DeadlineExceededError(IracingError):
+    """Raised when a call does not complete within its deadline."""
+
+    def __init__(self, message, response=None):
+        super(DeadlineExceededError, self).__init__(message, response=response)
@@ -0,0 +1,157 @@
+from irslashdata import logger
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from enum import Enum
+import os
+import pickle
+
+
+# This module keeps a local time series of chart_data() points for each
+# (cust_id, category_id, chart_type), stored column-wise as arrays of
+# timestamps and values. Refreshing a series only appends the points newer
+# than the last one stored, and range queries can downsample on the way out.
+
+# chart_data() always returns a driver's full history, so a refresh still
+# downloads it; what is saved is the work and memory of re-storing it.
+
+
+def _key(cust_id, category_id, chart_type):
+    if isinstance(category_id, Enum):
+        category_id = category_id.value
+    if isinstance(chart_type, Enum):
+        chart_type = chart_type.value
+    return (cust_id, category_id, chart_type)
+
+
+def _timestamp(when):
+    """ Converts a chart_data 'when' string, a date or an ISO datetime, to a
+    UTC epoch timestamp in seconds.
+    """
+    point_time = datetime.fromisoformat(when.replace('Z', '+00:00'))
+    if point_time.tzinfo is None:
+        point_time = point_time.replace(tzinfo=timezone.utc)
+    return int(point_time.timestamp())
+
+
+class ChartHistoryStore:
+    def __init__(self):
+        """ Holds the series as {(cust_id, category_id, chart_type):
+        (timestamps, values)}, both array('q'), sorted by timestamp.
+        """
+        self.series = {}
+
+    def append(self, cust_id, category_id, chart_type, points):
+        """ Appends the points of a chart_data() response that are newer than
+        the last stored point of the series, including further points on the
+        same day. Returns how many were added.
+        """
+        key = _key(cust_id, category_id, chart_type)
+        if key not in self.series:
+            self.series[key] = (array('q'), array('q'))
+        timestamps, values = self.series[key]
+
+        last = timestamps[-1] if timestamps else None
+        # 'when' is a date, so several races on the last stored day share its
+        # timestamp. Count them to tell which points on that day are new.
+        stored_on_last = 0
+        while stored_on_last < len(timestamps) and timestamps[-1 - stored_on_last] == last:
+            stored_on_last += 1
+
+        new_points = []
+        received_on_last = []
+
+        # Points arrive oldest first, so walk back from the newest until
+        # reaching what is already stored.
+        for point in reversed(points):
+            timestamp = _timestamp(point['when'])
+            if last is not None and timestamp < last:
+                break
+            if timestamp == last:
+                received_on_last.append(point['value'])
+            else:
+                new_points.append((timestamp, point['value']))
+
+        # The newest points on the last stored day are the ones not seen yet.
+        received_on_last.reverse()
+        new_points.reverse()
+        new_points = [(last, value) for value in received_on_last[stored_on_last:]] + new_points
+
+        for timestamp, value in new_points:
+            timestamps.append(timestamp)
+            values.append(value)
+
+        return len(new_points)
+
+    async def refresh(self, client, cust_id, category_id=2, chart_type=1):
+        """ Fetches the series with client.chart_data() and appends the new
+        points. Returns how many were added, or None if the fetch failed.
+        """
+        key = _key(cust_id, category_id, chart_type)
+        points = await client.chart_data(*key)
+
+        if points is None:
+            logger.info(f"No chart data returned for {key}.")
+            return None
+
+        return self.append(cust_id, category_id, chart_type, points)
+
+    def range(self, cust_id, category_id=2, chart_type=1, start=None, end=None, max_points=None):
+        """ Returns a list of (timestamp, value) tuples for the series between
+        the start and end timestamps, inclusive. If max_points is given and
+        there are more points than that, the range is split into max_points
+        equal time buckets and the last point in each bucket is returned.
+        """
+        key = _key(cust_id, category_id, chart_type)
+        if key not in self.series:
+            return []
+        timestamps, values = self.series[key]
+
+        low = 0 if start is None else bisect_left(timestamps, start)
+        high = len(timestamps) if end is None else bisect_right(timestamps, end)
+
+        if max_points is None or high - low <= max_points:
+            return list(zip(timestamps[low:high], values[low:high]))
+
+        first = timestamps[low]
+        bucket_width = (timestamps[high - 1] - first) / max_points or 1
+        points = []
+        last_bucket = None
+
+        for i in range(low, high):
+            bucket = min(int((timestamps[i] - first) / bucket_width), max_points - 1)
+            if bucket == last_bucket:
+                points[-1] = (timestamps[i], values[i])
+            else:
+                points.append((timestamps[i], values[i]))
+            last_bucket = bucket
+
+        return points
+
+    def latest(self, cust_id, category_id=2, chart_type=1):
+        """ Returns the newest (timestamp, value) of the series, or None.
+        """
+        key = _key(cust_id, category_id, chart_type)
+        if key not in self.series or not self.series[key][0]:
+            return None
+        timestamps, values = self.series[key]
+        return (timestamps[-1], values[-1])
+
+    def save(self, path: str):
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as history_file:
+            pickle.dump(self.series, history_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def load(self, path: str):
+        """ Loads series saved by save(). Only load files written by this
+        module. Returns False if there is no file at path.
+        """
+        try:
+            with open(path, 'rb') as history_file:
+                self.series = pickle.load(history_file)
+        except FileNotFoundError:
+            return False
+
+        return True
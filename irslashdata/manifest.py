@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+import json
+import os
+
+
+# This module tracks the download of a chunked data call: the chunk_info
+# returned by the API and the status of every chunk file in it. Client keeps
+# the manifest of a download that failed part way, so the next identical call
+# only fetches the chunks that are missing, straight from the signed
+# base_download_url and without asking the API again. In store mode the
+# manifest is also written next to the chunk files, so a download interrupted
+# by a crash can be resumed by another process.
+
+# The signed chunk URLs expire, so a manifest is only reused for MAX_AGE
+# seconds after the chunk_info was fetched.
+MAX_AGE = 10 * 60
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ChunkManifest:
+    def __init__(self, chunk_info: dict, created_at: float = None, status: dict = None):
+        self.base_download_url = chunk_info['base_download_url']
+        self.chunk_file_names = list(chunk_info['chunk_file_names'])
+        self.created_at = created_at if created_at is not None else datetime.now(timezone.utc).timestamp()
+        self.status = status if status is not None else {name: PENDING for name in self.chunk_file_names}
+        # chunk file name: decoded records, for downloads kept in memory.
+        self.records = {}
+
+    def is_expired(self, max_age: float = MAX_AGE):
+        return datetime.now(timezone.utc).timestamp() - self.created_at > max_age
+
+    def chunk_url(self, chunk_filename):
+        return self.base_download_url + chunk_filename
+
+    def pending(self):
+        """ Returns the chunk file names not downloaded yet, in order.
+        """
+        return [name for name in self.chunk_file_names if self.status[name] != DONE]
+
+    def is_complete(self):
+        return all(self.status[name] == DONE for name in self.chunk_file_names)
+
+    def to_dict(self):
+        return {
+            'chunk_info': {
+                'base_download_url': self.base_download_url,
+                'chunk_file_names': self.chunk_file_names
+            },
+            'created_at': self.created_at,
+            'status': self.status
+        }
+
+    def save(self, path: str):
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as manifest_file:
+            json.dump(self.to_dict(), manifest_file)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """ Returns the manifest saved at path, or None if there is none.
+        """
+        try:
+            with open(path, 'r') as manifest_file:
+                manifest_dict = json.load(manifest_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        return cls(manifest_dict['chunk_info'], manifest_dict['created_at'], manifest_dict['status'])
@@ -0,0 +1,351 @@
+from irslashdata import logger
+
+import asyncio
+import math
+import time
+
+
+# This module sizes a bulk job before it is run. It only makes the cheap index
+# calls, reading the chunk_info of each search window or lap data call without
+# downloading any chunk, and estimates the requests, bytes and wall-clock time
+# the full job would take under a rate limit and concurrency.
+
+# Only the first request of each data call goes to the members-ng API and
+# counts against the rate limit. Links and chunk files are served from S3.
+# The number of requests of each kind a call makes, before its chunks:
+API_REQUESTS = 1
+LINK_REQUESTS = {
+    'search_results': 0,
+    'lap_data': 1,
+    'subsession_data': 1,
+}
+
+# Approximate size of one decoded record, used when the chunk files aren't
+# measured, and of one subsession_data() payload, which has no chunk_info.
+ROW_BYTES = {
+    'search_results': 1200,
+    'lap_data': 450,
+}
+SUBSESSION_BYTES = 60 * 1024
+
+# The members-ng API allows RATE_LIMIT requests every RATE_WINDOW seconds.
+# The limit, and the budget left in the current window, are taken from the
+# rate-limit headers seen while probing when there are any.
+RATE_LIMIT = 240
+RATE_WINDOW = 60
+# Download rate assumed for the bodies, in bytes per second.
+BANDWIDTH = 5 * 1024 * 1024
+# Seconds per request assumed when nothing has been probed.
+DEFAULT_LATENCY = 0.5
+# Subsessions fetched by plan_subsession_bundles() to find how many
+# simsessions, and so lap data calls, a subsession has.
+SUBSESSION_SAMPLE = 10
+
+
+class BulkPlan:
+    """ The calls of a bulk job and what they are expected to cost. Every
+    item is a dict with the 'kind' of call, its 'arguments', and the
+    'api_requests', 'requests', 'chunks', 'rows' and 'bytes' it takes.
+    Items that were not probed are extrapolated from those that were, and
+    have 'estimated' set. Items whose probe failed are extrapolated the same
+    way and also have 'failed' set.
+    """
+    def __init__(self):
+        self.items = []
+        # Requests made while planning, and their total duration.
+        self.probe_requests = 0
+        self.probe_seconds = 0.0
+        # The client's last_rate_limit once probing is done, or None.
+        self.rate_limit = None
+
+    def add(self, kind, arguments, chunks=0, rows=0, size=0, estimated=False, failed=False):
+        self.items.append({
+            'kind': kind,
+            'arguments': arguments,
+            'api_requests': API_REQUESTS,
+            'requests': API_REQUESTS + LINK_REQUESTS[kind] + chunks,
+            'chunks': chunks,
+            'rows': rows,
+            'bytes': size,
+            'estimated': estimated,
+            'failed': failed
+        })
+
+    def latency(self):
+        if self.probe_requests == 0:
+            return DEFAULT_LATENCY
+        return self.probe_seconds / self.probe_requests
+
+    def estimate(
+        self,
+        concurrency: int = 1,
+        rate_limit: int = None,
+        rate_window: float = RATE_WINDOW,
+        bandwidth: float = BANDWIDTH
+    ):
+        """ Returns a dict of the job's totals and its expected duration in
+        'seconds': the longer of the time the requests take at concurrency
+        requests in flight, and the time the rate limit spreads the API
+        requests over. 'rate_windows' is the number of rate-limit windows the
+        API requests span.
+
+        If rate_limit isn't given, the limit and the budget left in the
+        current window come from the rate-limit headers seen while probing,
+        or RATE_LIMIT with a full budget if none were seen.
+        """
+        totals = {
+            'calls': len(self.items),
+            'api_requests': sum(item['api_requests'] for item in self.items),
+            'requests': sum(item['requests'] for item in self.items),
+            'chunks': sum(item['chunks'] for item in self.items),
+            'rows': sum(item['rows'] for item in self.items),
+            'bytes': sum(item['bytes'] for item in self.items),
+            'estimated_calls': sum(1 for item in self.items if item['estimated']),
+            'failed_calls': sum(1 for item in self.items if item['failed'])
+        }
+
+        if rate_limit is None and self.rate_limit is not None:
+            rate_limit = self.rate_limit['limit']
+            budget = self.rate_limit['remaining']
+            first_wait = max(0.0, self.rate_limit['reset'] - time.time())
+        else:
+            rate_limit = rate_limit if rate_limit is not None else RATE_LIMIT
+            budget = rate_limit
+            first_wait = rate_window
+
+        # The requests within the budget go out at once, and the rest wait
+        # for the current window to reset and then a window per rate_limit.
+        over_budget = max(0, totals['api_requests'] - budget)
+        rate_windows = 1 + math.ceil(over_budget / max(1, rate_limit))
+        rate_seconds = first_wait + (rate_windows - 2) * rate_window if over_budget else 0.0
+        work_seconds = (totals['requests'] * self.latency() + totals['bytes'] / bandwidth) / max(1, concurrency)
+
+        totals['rate_limit'] = rate_limit
+        totals['rate_windows'] = rate_windows
+        totals['seconds'] = max(rate_seconds, work_seconds)
+        totals['rate_limited'] = rate_seconds > work_seconds
+        return totals
+
+    def summary(self, **settings):
+        """ Returns estimate(**settings) as a few lines of text.
+        """
+        totals = self.estimate(**settings)
+        lines = [
+            f"{totals['calls']} calls ({totals['estimated_calls']} extrapolated, "
+            f"{totals['failed_calls']} of them because their probe failed)",
+            f"{totals['requests']} requests, {totals['api_requests']} of them to the rate-limited API, "
+            f"over {totals['rate_windows']} windows of {totals['rate_limit']} requests",
+            f"{totals['chunks']} chunk files, {totals['rows']} rows, about {totals['bytes'] / 1024 / 1024:.1f} MiB",
+            f"about {totals['seconds'] / 60:.1f} minutes"
+            + (", bound by the rate limit" if totals['rate_limited'] else ""),
+        ]
+        return '\n'.join(lines)
+
+
+def _average(items):
+    """ Returns the average chunks, rows and bytes of items, as ints.
+    """
+    count = max(1, len(items))
+    return (
+        round(sum(item['chunks'] for item in items) / count),
+        round(sum(item['rows'] for item in items) / count),
+        round(sum(item['bytes'] for item in items) / count)
+    )
+
+
+def _sample_indexes(count, sample):
+    """ Returns the indexes of up to sample items spread evenly over count.
+    """
+    if sample is None or sample >= count:
+        return list(range(count))
+    if sample <= 0:
+        return []
+    step = count / sample
+    return sorted({int(i * step) for i in range(sample)})
+
+
+class BulkPlanner:
+    def __init__(self, client, max_concurrency: int = 4, measure_bytes: bool = False):
+        """ Plans bulk jobs for client. Probes run max_concurrency at a time.
+        If measure_bytes is True, every chunk file is sized with a ranged GET
+        for its first byte instead of estimating from its row count, falling
+        back to the estimate when that fails.
+
+        Usage:
+            plan = await BulkPlanner(client).plan_search([{'series_id': 139, ...}, ...], sample=10)
+            print(plan.summary(concurrency=8))
+        """
+        self.client = client
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.measure_bytes = measure_bytes
+
+    async def _chunk_bytes(self, chunk_info):
+        """ Returns the total size of the chunk files, or None if any of them
+        couldn't be sized.
+        """
+        total = 0
+        for chunk_filename in chunk_info['chunk_file_names']:
+            size = await self.client.chunk_size(chunk_info['base_download_url'] + chunk_filename)
+            if size is None:
+                return None
+            total += size
+        return total
+
+    async def _probe(self, plan, kind, arguments, call):
+        """ Makes the index call of one item and adds it to plan. Returns
+        False, without adding it, if the chunk_info couldn't be retrieved.
+        """
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            chunk_info = await call(plan=True, **arguments)
+            plan.probe_requests += API_REQUESTS + LINK_REQUESTS[kind]
+
+            if chunk_info is None:
+                plan.probe_seconds += loop.time() - started
+                logger.info(f"No chunk_info for {kind} {arguments}.")
+                return False
+
+            chunks = len(chunk_info['chunk_file_names'])
+            rows = chunk_info.get('rows', 0)
+            size = None
+            if self.measure_bytes:
+                size = await self._chunk_bytes(chunk_info)
+                plan.probe_requests += chunks
+            if size is None:
+                size = rows * ROW_BYTES[kind]
+            plan.probe_seconds += loop.time() - started
+
+            plan.add(kind, arguments, chunks=chunks, rows=rows, size=size)
+            return True
+
+    async def _plan(self, kind, call, argument_list, sample, plan):
+        plan = plan if plan is not None else BulkPlan()
+        argument_list = list(argument_list)
+        probed = _sample_indexes(len(argument_list), sample)
+
+        first = len(plan.items)
+        succeeded = await asyncio.gather(*[self._probe(plan, kind, argument_list[i], call) for i in probed])
+        probed_items = plan.items[first:]
+        plan.rate_limit = self.client.last_rate_limit or plan.rate_limit
+
+        # Items that weren't probed, or whose probe failed, get the average of
+        # those that were probed.
+        failed = [argument_list[i] for i, ok in zip(probed, succeeded) if not ok]
+        probed = set(probed)
+        skipped = [arguments for i, arguments in enumerate(argument_list) if i not in probed]
+        if failed and not probed_items:
+            logger.warning(f"Every {kind} probe failed. Their calls are planned without chunks.")
+
+        chunks, rows, size = _average(probed_items)
+        for arguments in failed:
+            plan.add(kind, arguments, chunks=chunks, rows=rows, size=size, estimated=True, failed=True)
+        for arguments in skipped:
+            plan.add(kind, arguments, chunks=chunks, rows=rows, size=size, estimated=True)
+
+        return plan
+
+    async def plan_search(self, windows, sample: int = None, plan: BulkPlan = None):
+        """ Plans a search_results() call for each dict of its keyword
+        arguments in windows. If sample is given, only that many windows,
+        spread evenly, are probed and the rest extrapolated. Items are added
+        to plan if one is passed. Returns the BulkPlan.
+        """
+        return await self._plan('search_results', self.client.search_results, windows, sample, plan)
+
+    async def plan_lap_data(self, simsessions, sample: int = None, plan: BulkPlan = None):
+        """ Plans a lap_data() call for each (subsession_id, simsession_number)
+        in simsessions, probing as plan_search() does.
+        """
+        argument_list = [
+            {'subsession_id': subsession_id, 'simsession_number': simsession_number}
+            for subsession_id, simsession_number in simsessions
+        ]
+        return await self._plan('lap_data', self.client.lap_data, argument_list, sample, plan)
+
+    def plan_subsessions(self, subsession_ids, plan: BulkPlan = None):
+        """ Plans a subsession_data() call for each of subsession_ids. They
+        aren't chunked, so nothing is probed and sizes are estimated.
+        """
+        plan = plan if plan is not None else BulkPlan()
+        for subsession_id in subsession_ids:
+            plan.add('subsession_data', {'subsession_id': subsession_id}, size=SUBSESSION_BYTES, estimated=True)
+        return plan
+
+    async def _simsessions(self, plan, subsession_id):
+        """ Fetches one subsession and returns its (subsession_id,
+        simsession_number) pairs, or None if it couldn't be retrieved.
+        """
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            subsession = await self.client.subsession_data(subsession_id)
+            plan.probe_seconds += loop.time() - started
+            plan.probe_requests += API_REQUESTS + LINK_REQUESTS['subsession_data']
+
+        if subsession is None:
+            return None
+
+        return [
+            (subsession_id, session_result['simsession_number'])
+            for session_result in subsession.get('session_results', [])
+            if 'simsession_number' in session_result
+        ]
+
+    async def plan_subsession_bundles(
+        self,
+        subsession_ids,
+        sample: int = SUBSESSION_SAMPLE,
+        plan: BulkPlan = None
+    ):
+        """ Plans a subsession_bundle() call for each of subsession_ids: its
+        subsession_data() call and a lap_data() call for every simsession.
+        sample subsessions, spread evenly, are fetched to find their
+        simsessions and their lap data is probed. The lap data calls of the
+        other subsessions, and of sampled ones that couldn't be fetched, are
+        extrapolated from them.
+        """
+        subsession_ids = list(subsession_ids)
+        plan = plan if plan is not None else BulkPlan()
+        first = len(plan.items)
+        self.plan_subsessions(subsession_ids, plan)
+        subsession_items = {item['arguments']['subsession_id']: item for item in plan.items[first:]}
+
+        probed_ids = [subsession_ids[i] for i in _sample_indexes(len(subsession_ids), sample)]
+        simsessions = await asyncio.gather(*[self._simsessions(plan, subsession_id) for subsession_id in probed_ids])
+        found = [pairs for pairs in simsessions if pairs is not None]
+        pairs = [pair for subsession_pairs in found for pair in subsession_pairs]
+
+        failed_ids = set()
+        for subsession_id, subsession_pairs in zip(probed_ids, simsessions):
+            if subsession_pairs is None:
+                subsession_items[subsession_id]['failed'] = True
+                failed_ids.add(subsession_id)
+
+        first = len(plan.items)
+        await self.plan_lap_data(pairs, plan=plan)
+        lap_items = [item for item in plan.items[first:] if not item['failed']]
+
+        if not found:
+            logger.warning("None of the sampled subsessions could be retrieved. Lap data calls are not planned.")
+            return plan
+
+        probed = set(probed_ids) - failed_ids
+        others = [subsession_id for subsession_id in subsession_ids if subsession_id not in probed]
+        per_subsession = len(pairs) / len(found)
+        chunks, rows, size = _average(lap_items)
+
+        for index, subsession_id in enumerate(others):
+            # Spread the fractional average so the total comes out right.
+            for _ in range(round(per_subsession * (index + 1)) - round(per_subsession * index)):
+                plan.add(
+                    'lap_data',
+                    {'subsession_id': subsession_id, 'simsession_number': None},
+                    chunks=chunks,
+                    rows=rows,
+                    size=size,
+                    estimated=True,
+                    failed=subsession_id in failed_ids
+                )
+
+        return plan
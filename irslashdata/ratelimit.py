@@ -0,0 +1,141 @@
+from irslashdata import logger
+
+from datetime import datetime, timezone
+import asyncio
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# This module lets several Client instances, in one or more processes on the
+# same machine, share a single iRacing rate-limit budget. The budget is kept in
+# a small JSON state file guarded by an exclusive file lock. It is seeded from
+# the x-ratelimit-remaining and x-ratelimit-reset response headers, and every
+# request reserves one unit of it before being sent.
+
+# Rather than letting every worker run at full speed until the budget is gone
+# and then stalling together, the remaining budget is spread over the time left
+# in the window and split evenly between the workers seen recently.
+
+# Requests are held once the shared budget reaches RESERVE, the same floor
+# Client uses on its own.
+RESERVE = 50
+# A worker that has not touched the state file for this many seconds is no
+# longer counted when splitting the budget.
+WORKER_TIMEOUT = 60
+
+
+class RateLimitCoordinator:
+    def __init__(self, state_file: str, reserve: int = RESERVE):
+        """ Coordinates the rate-limit budget through state_file. Every process
+        using the same account should create its coordinator with the same
+        state_file and pass it to Client(rate_limiter=...).
+        """
+        if fcntl is None:
+            raise ImportError("RateLimitCoordinator requires fcntl file locking, which is not available.")
+
+        self.state_file = state_file
+        self.lock_file = state_file + '.lock'
+        self.reserve = reserve
+        self.worker_id = str(os.getpid())
+        self.next_request_at = 0.0
+
+    def _now(self):
+        return datetime.now(timezone.utc).timestamp()
+
+    def _read_state(self):
+        try:
+            with open(self.state_file, 'r') as state_file:
+                return json.load(state_file)
+        except (FileNotFoundError, ValueError):
+            return {'remaining': None, 'reset': None, 'workers': {}}
+
+    def _write_state(self, state):
+        temp_path = self.state_file + '.tmp'
+        with open(temp_path, 'w') as state_file:
+            json.dump(state, state_file)
+        os.replace(temp_path, self.state_file)
+
+    def _update_state(self, change):
+        """ Runs change(state, now) while holding the exclusive lock, writes the
+        state back and returns whatever change returned.
+        """
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                now = self._now()
+                state = self._read_state()
+
+                workers = state['workers']
+                workers[self.worker_id] = now
+                for worker_id in list(workers):
+                    if now - workers[worker_id] > WORKER_TIMEOUT:
+                        del workers[worker_id]
+
+                result = change(state, now)
+                self._write_state(state)
+                return result
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    async def _run_locked(self, change):
+        """ Runs _update_state(change) in the default executor, so waiting for
+        the lock held by another worker doesn't block the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._update_state, change)
+
+    def _reserve(self, state, now):
+        """ Reserves one request from the shared budget and returns the number
+        of seconds this worker should wait before sending it.
+        """
+        if state['remaining'] is None or state['reset'] is None or now >= state['reset']:
+            # No headers seen yet in this window, nothing to pace against.
+            return 0.0
+
+        time_to_reset = state['reset'] - now
+
+        if state['remaining'] <= self.reserve:
+            logger.info(f"Shared rate limit exhausted. Sleeping http requests for {int(time_to_reset)} seconds")
+            return time_to_reset
+
+        interval = time_to_reset * len(state['workers']) / (state['remaining'] - self.reserve)
+        state['remaining'] -= 1
+
+        slot = max(now, self.next_request_at)
+        self.next_request_at = slot + interval
+        return slot - now
+
+    async def acquire(self):
+        """ Waits until this worker may send its next request.
+        """
+        delay = await self._run_locked(self._reserve)
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def update(self, headers):
+        """ Seeds the shared budget from the rate-limit headers of a response.
+        """
+        if 'x-ratelimit-remaining' not in headers or 'x-ratelimit-reset' not in headers:
+            return
+
+        remaining = int(headers['x-ratelimit-remaining'])
+        reset = int(headers['x-ratelimit-reset'])
+
+        def change(state, now):
+            if state['reset'] != reset or state['remaining'] is None:
+                state['remaining'] = remaining
+            else:
+                # Other workers may have reserved requests that the server has
+                # not counted yet, so never raise the budget within a window.
+                state['remaining'] = min(state['remaining'], remaining)
+            state['reset'] = reset
+            return state['remaining']
+
+        shared_remaining = await self._run_locked(change)
+        logger.info(f"rate_limit_remaining: {remaining} (shared: {shared_remaining})")
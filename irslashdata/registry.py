@@ -0,0 +1,242 @@
+from irslashdata import logger
+from irslashdata.snapshot import Snapshot, write_snapshot
+
+from datetime import datetime, timezone
+import asyncio
+
+
+# This module loads iRacing's reference data (tracks, cars, car classes and
+# current seasons) into indexes keyed by ID, so that results which only carry
+# numeric IDs can be enriched with names without further API calls.
+
+# Each dataset is reloaded lazily, the next time it is needed after it has
+# become older than max_age seconds.
+
+# The indexes can be saved to and restored from a local snapshot file, so a
+# restarted service can enrich results before making any API call.
+
+# dataset name: (Client method, ID key)
+DATASETS = {
+    'tracks': ('track_get', 'track_id'),
+    'cars': ('car_get', 'car_id'),
+    'car_classes': ('current_car_classes', 'car_class_id'),
+    'seasons': ('current_seasons', 'season_id'),
+}
+
+DEFAULT_MAX_AGE = 6 * 60 * 60
+
+
+def _series_name(season):
+    if 'series_name' in season:
+        return season['series_name']
+
+    for schedule in season.get('schedules', []):
+        if 'series_name' in schedule:
+            return schedule['series_name']
+
+    return season.get('season_name')
+
+
+class ReferenceRegistry:
+    def __init__(self, client, max_age: float = DEFAULT_MAX_AGE):
+        """ Holds ID-keyed indexes of the reference datasets fetched through
+        client. Nothing is fetched until refresh() or enrich() is awaited.
+        """
+        self.client = client
+        self.max_age = max_age
+
+        # dataset name: {ID: record}, including the derived 'series' index
+        self.indexes = {}
+        self.loaded_at = {dataset: None for dataset in DATASETS}
+        self.snapshot = None
+        self.refresh_task = None
+
+        # ID key: {ID: fields added to records carrying that ID}
+        self.fields = {}
+
+    def _index(self, name):
+        if name not in self.indexes and self.snapshot is not None and name in self.snapshot:
+            try:
+                self.indexes[name] = self.snapshot[name]
+            except ValueError as exc:
+                # Treated as never loaded, so the next refresh fetches it again.
+                logger.warning(f"Could not read {name} from the snapshot: {exc}")
+                self.loaded_at[name] = None
+
+        return self.indexes.get(name, {})
+
+    @property
+    def tracks(self):
+        return self._index('tracks')
+
+    @property
+    def cars(self):
+        return self._index('cars')
+
+    @property
+    def car_classes(self):
+        return self._index('car_classes')
+
+    @property
+    def seasons(self):
+        return self._index('seasons')
+
+    @property
+    def series(self):
+        return self._index('series')
+
+    def _is_stale(self, dataset, now):
+        loaded_at = self.loaded_at[dataset]
+        return loaded_at is None or now - loaded_at > self.max_age
+
+    async def _load(self, dataset):
+        method, id_key = DATASETS[dataset]
+        records = await getattr(self.client, method)()
+
+        if records is None:
+            logger.warning(f"Could not load {dataset} reference data. Keeping the previous index.")
+            return
+
+        self.indexes[dataset] = {record[id_key]: record for record in records if id_key in record}
+        self.loaded_at[dataset] = datetime.now(timezone.utc).timestamp()
+        logger.info(f"Loaded {len(records)} {dataset}.")
+
+    async def refresh(self, force: bool = False):
+        """ Reloads every dataset that is stale, or all of them if force is
+        True, concurrently. Then rebuilds the enrichment tables.
+        """
+        now = datetime.now(timezone.utc).timestamp()
+        stale = [dataset for dataset in DATASETS if force or self._is_stale(dataset, now)]
+
+        if not stale:
+            return
+
+        await asyncio.gather(*[self._load(dataset) for dataset in stale])
+        self._build_fields()
+
+    def _build_fields(self):
+        series = {}
+        for season in self.seasons.values():
+            if 'series_id' in season:
+                series[season['series_id']] = {
+                    'series_id': season['series_id'],
+                    'series_name': _series_name(season)
+                }
+        self.indexes['series'] = series
+
+        self.fields = {
+            'track_id': {
+                track_id: {
+                    'track_name': track.get('track_name'),
+                    'config_name': track.get('config_name')
+                }
+                for track_id, track in self.tracks.items()
+            },
+            'car_id': {
+                car_id: {
+                    'car_name': car.get('car_name')
+                }
+                for car_id, car in self.cars.items()
+            },
+            'car_class_id': {
+                car_class_id: {
+                    'car_class_name': car_class.get('name'),
+                    'car_class_short_name': car_class.get('short_name')
+                }
+                for car_class_id, car_class in self.car_classes.items()
+            },
+            'series_id': {
+                series_id: {
+                    'series_name': series['series_name']
+                }
+                for series_id, series in self.series.items()
+            },
+            'season_id': {
+                season_id: {
+                    'season_name': season.get('season_name')
+                }
+                for season_id, season in self.seasons.items()
+            },
+        }
+
+    def enrich_loaded(self, records):
+        """ Returns a new list of records with names from the currently loaded
+        indexes added to every record that carries a top-level track_id,
+        car_id, car_class_id, series_id or season_id, in a single pass.
+        Enriched records are copies; the records passed in are not modified,
+        since Client may share them between callers of the same request.
+        """
+        lookups = [(id_key, table) for id_key, table in self.fields.items() if table]
+        enriched = []
+
+        for record in records:
+            added = None
+            for id_key, table in lookups:
+                fields = table.get(record.get(id_key))
+                if fields is not None:
+                    if added is None:
+                        added = dict(record)
+                    added.update(fields)
+            enriched.append(added if added is not None else record)
+
+        return enriched
+
+    async def enrich(self, records):
+        """ Refreshes any stale datasets, then returns enriched copies of
+        records as enrich_loaded() does.
+        """
+        await self.refresh()
+        return self.enrich_loaded(records)
+
+    def save_snapshot(self, path: str):
+        """ Writes the loaded indexes and enrichment tables to path.
+        """
+        datasets = {name: self._index(name) for name in list(DATASETS) + ['series']}
+        datasets['fields'] = self.fields
+        write_snapshot(path, datasets, self.loaded_at)
+
+    def load_snapshot(self, path: str):
+        """ Restores the registry from a snapshot written by save_snapshot().
+        Only the enrichment tables are decoded straight away; the full
+        indexes are decoded from the memory-mapped file when first accessed.
+        Datasets keep the age they had when saved, so stale ones are still
+        refreshed lazily. Returns False if there is no usable snapshot.
+        """
+        try:
+            snapshot = Snapshot(path)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Could not load snapshot {path}: {exc}")
+            return False
+
+        try:
+            fields = snapshot['fields']
+        except (KeyError, ValueError) as exc:
+            snapshot.close()
+            logger.warning(f"Could not load snapshot {path}: {exc!r}")
+            return False
+
+        if self.snapshot is not None:
+            self.snapshot.close()
+
+        self.snapshot = snapshot
+        self.indexes = {}
+        self.fields = fields
+        self.loaded_at.update(snapshot.loaded_at)
+        logger.info(f"Loaded reference data snapshot from {path}.")
+        return True
+
+    async def _refresh_snapshot(self, path):
+        await self.refresh(force=True)
+        # Decode anything still held only in the old snapshot before replacing it.
+        for name in list(DATASETS) + ['series']:
+            self._index(name)
+        self.save_snapshot(path)
+
+    def start_background_refresh(self, path: str):
+        """ Starts a task that reloads every dataset from the API and then
+        rewrites the snapshot at path. Returns the asyncio.Task.
+        """
+        self.refresh_task = asyncio.ensure_future(self._refresh_snapshot(path))
+        return self.refresh_task
@@ -0,0 +1,244 @@
+from irslashdata import logger
+
+import json
+import sqlite3
+
+
+# This module keeps harvested results in a local SQLite database so repeated
+# questions such as "every race for this driver at this track in this car
+# this season" are answered locally instead of with another API round-trip.
+
+# subsessions holds one row per subsession and, once ingested from
+# subsession_data(), its full payload. results holds one row per driver per
+# simsession, with the filterable fields as indexed columns and the original
+# row as JSON. Rows from search_results() are stored as simsession 0, the
+# main event.
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS subsessions (
+    subsession_id INTEGER PRIMARY KEY,
+    series_id INTEGER,
+    season_id INTEGER,
+    season_year INTEGER,
+    season_quarter INTEGER,
+    race_week_num INTEGER,
+    track_id INTEGER,
+    start_time TEXT,
+    payload TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    subsession_id INTEGER NOT NULL,
+    simsession_number INTEGER NOT NULL,
+    cust_id INTEGER NOT NULL,
+    team_id INTEGER,
+    series_id INTEGER,
+    season_year INTEGER,
+    season_quarter INTEGER,
+    race_week_num INTEGER,
+    track_id INTEGER,
+    car_id INTEGER,
+    car_class_id INTEGER,
+    start_time TEXT,
+    finish_position INTEGER,
+    incidents INTEGER,
+    row TEXT,
+    PRIMARY KEY (subsession_id, simsession_number, cust_id)
+);
+CREATE INDEX IF NOT EXISTS results_cust_id ON results (cust_id, start_time);
+CREATE INDEX IF NOT EXISTS results_series_id ON results (series_id, start_time);
+CREATE INDEX IF NOT EXISTS results_track_id ON results (track_id, start_time);
+CREATE INDEX IF NOT EXISTS results_car_id ON results (car_id, start_time);
+CREATE INDEX IF NOT EXISTS results_start_time ON results (start_time);
+CREATE INDEX IF NOT EXISTS subsessions_series_id ON subsessions (series_id, start_time);
+CREATE INDEX IF NOT EXISTS subsessions_start_time ON subsessions (start_time);
+'''
+
+RESULT_COLUMNS = (
+    'subsession_id', 'simsession_number', 'cust_id', 'team_id', 'series_id',
+    'season_year', 'season_quarter', 'race_week_num', 'track_id', 'car_id',
+    'car_class_id', 'start_time', 'finish_position', 'incidents', 'row'
+)
+
+# Filters accepted by query(), as column: SQL condition.
+QUERY_FILTERS = {
+    'cust_id': 'cust_id = ?',
+    'team_id': 'team_id = ?',
+    'series_id': 'series_id = ?',
+    'track_id': 'track_id = ?',
+    'car_id': 'car_id = ?',
+    'car_class_id': 'car_class_id = ?',
+    'season_year': 'season_year = ?',
+    'season_quarter': 'season_quarter = ?',
+    'race_week_num': 'race_week_num = ?',
+    'simsession_number': 'simsession_number = ?',
+    'start_after': 'start_time >= ?',
+    'start_before': 'start_time < ?',
+}
+
+
+def _track_id(record):
+    if 'track_id' in record:
+        return record['track_id']
+    if isinstance(record.get('track'), dict):
+        return record['track'].get('track_id')
+    return None
+
+
+class ResultsDatabase:
+    def __init__(self, path: str = ':memory:'):
+        """ Opens, creating if needed, the results database at path.
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _subsession_row(self, record, payload=None):
+        return (
+            record['subsession_id'],
+            record.get('series_id'),
+            record.get('season_id'),
+            record.get('season_year'),
+            record.get('season_quarter'),
+            record.get('race_week_num'),
+            _track_id(record),
+            record.get('start_time'),
+            payload
+        )
+
+    def _result_row(self, subsession, simsession_number, result, team_result=None):
+        car_source = team_result if team_result is not None else result
+        return (
+            subsession['subsession_id'],
+            simsession_number,
+            result['cust_id'],
+            result.get('team_id', car_source.get('team_id')),
+            subsession.get('series_id'),
+            subsession.get('season_year'),
+            subsession.get('season_quarter'),
+            subsession.get('race_week_num'),
+            _track_id(subsession),
+            result.get('car_id', car_source.get('car_id')),
+            result.get('car_class_id', car_source.get('car_class_id')),
+            subsession.get('start_time'),
+            result.get('finish_position', car_source.get('finish_position')),
+            result.get('incidents'),
+            json.dumps(result)
+        )
+
+    def _insert(self, subsession_rows, result_rows, replace_payload):
+        # Never overwrite a full payload, or the driver rows taken from it,
+        # with a search row.
+        conflict = 'REPLACE' if replace_payload else 'IGNORE'
+        subsession_sql = f'INSERT OR {conflict} INTO subsessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'
+        result_sql = f"INSERT OR {conflict} INTO results VALUES ({', '.join('?' * len(RESULT_COLUMNS))})"
+
+        with self.connection:
+            self.connection.executemany(subsession_sql, subsession_rows)
+            self.connection.executemany(result_sql, result_rows)
+
+    def ingest_results(self, rows):
+        """ Stores the rows returned by search_results() in one transaction.
+        Rows for a single driver are also stored in results. Returns the
+        number of rows stored.
+        """
+        subsession_rows = []
+        result_rows = []
+
+        for row in rows:
+            if 'subsession_id' not in row:
+                continue
+            subsession_rows.append(self._subsession_row(row))
+            if 'cust_id' in row:
+                result_rows.append(self._result_row(row, 0, row))
+
+        self._insert(subsession_rows, result_rows, replace_payload=False)
+        return len(subsession_rows)
+
+    def ingest_subsessions(self, subsessions):
+        """ Stores subsession_data() payloads, and a row for every driver in
+        every simsession of each, in one transaction. Team events are stored
+        per driver with the team's car and finish position. Returns the
+        number of driver rows stored.
+        """
+        subsession_rows = []
+        result_rows = []
+
+        for subsession in subsessions:
+            if subsession is None or 'subsession_id' not in subsession:
+                continue
+            subsession_rows.append(self._subsession_row(subsession, json.dumps(subsession)))
+
+            for session_result in subsession.get('session_results', []):
+                simsession_number = session_result.get('simsession_number', 0)
+
+                for result in session_result.get('results', []):
+                    if 'driver_results' in result:
+                        for driver_result in result['driver_results']:
+                            result_rows.append(
+                                self._result_row(subsession, simsession_number, driver_result, team_result=result)
+                            )
+                    elif 'cust_id' in result:
+                        result_rows.append(self._result_row(subsession, simsession_number, result))
+
+        self._insert(subsession_rows, result_rows, replace_payload=True)
+        logger.debug(f"Ingested {len(subsession_rows)} subsessions with {len(result_rows)} driver rows.")
+        return len(result_rows)
+
+    def ingest_subsession(self, subsession):
+        return self.ingest_subsessions([subsession])
+
+    def query(self, limit: int = None, **filters):
+        """ Returns the stored result rows matching every filter, newest first.
+        Each is a dict of the indexed columns, with the original result row
+        decoded under 'row'. Filters are the keys of QUERY_FILTERS, for example
+        query(cust_id=1, track_id=2, car_id=3, season_year=2022,
+        season_quarter=3). start_after and start_before take start times in
+        the API's ISO format.
+        """
+        unknown = set(filters) - set(QUERY_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown query filters: {', '.join(sorted(unknown))}")
+
+        conditions = [QUERY_FILTERS[name] for name in filters]
+        sql = 'SELECT * FROM results'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY start_time DESC'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+
+        results = []
+        for row in self.connection.execute(sql, list(filters.values())):
+            result = dict(row)
+            result['row'] = json.loads(result['row'])
+            results.append(result)
+
+        return results
+
+    def subsession_ids(self, series_id=None, start_after=None, start_before=None):
+        """ Returns the IDs of stored subsessions, newest first.
+        """
+        filters = {'series_id = ?': series_id, 'start_time >= ?': start_after, 'start_time < ?': start_before}
+        conditions = [condition for condition, value in filters.items() if value is not None]
+        sql = 'SELECT subsession_id FROM subsessions'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY start_time DESC'
+
+        values = [value for value in filters.values() if value is not None]
+        return [row['subsession_id'] for row in self.connection.execute(sql, values)]
+
+    def get_subsession(self, subsession_id):
+        """ Returns the stored subsession_data() payload, or None.
+        """
+        row = self.connection.execute(
+            'SELECT payload FROM subsessions WHERE subsession_id = ?', (subsession_id,)
+        ).fetchone()
+
+        if row is None or row['payload'] is None:
+            return None
+
+        return json.loads(row['payload'])
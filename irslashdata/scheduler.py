@@ -0,0 +1,148 @@
+from irslashdata import logger
+
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+import asyncio
+import contextvars
+
+
+# This module schedules a Client's HTTP requests between two priority classes.
+# Interactive requests, such as bot commands, are served first. Bulk requests,
+# such as crawlers, get the connections and rate-limit budget that are left,
+# plus a small number of reserved connections so they are never starved.
+
+# Requests are tagged through a context variable, so a whole crawl can be
+# marked as bulk without changing any method call:
+
+#     with request_priority(BULK):
+#         await client.search_results(...)
+
+# Untagged requests are interactive.
+
+INTERACTIVE = 0
+BULK = 1
+
+current_priority = contextvars.ContextVar('irslashdata_request_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority):
+    """ Tags every request made inside the with block, including those made
+    by tasks started inside it, with priority.
+    """
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class PriorityScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        bulk_reserved: int = 1,
+        bulk_rate_limit_floor: int = 100
+    ):
+        """ Allows up to max_concurrency requests at once. bulk_reserved of
+        those slots go to bulk requests whenever any are waiting. Bulk requests
+        are held once x-ratelimit-remaining drops below bulk_rate_limit_floor,
+        leaving the rest of the window's budget to interactive requests.
+        """
+        self.max_concurrency = max_concurrency
+        self.bulk_reserved = bulk_reserved
+        self.bulk_rate_limit_floor = bulk_rate_limit_floor
+
+        self.waiters = {INTERACTIVE: deque(), BULK: deque()}
+        self.active = {INTERACTIVE: 0, BULK: 0}
+        self.rate_limit_remaining = None
+        self.rate_limit_reset = None
+        self.reset_timer = None
+
+    def _bulk_budget_available(self):
+        if self.rate_limit_remaining is None or self.rate_limit_remaining >= self.bulk_rate_limit_floor:
+            return True
+
+        now = datetime.now(timezone.utc).timestamp()
+        if now >= self.rate_limit_reset:
+            self.rate_limit_remaining = None
+            return True
+
+        if self.reset_timer is None:
+            logger.info(
+                f"Holding bulk requests until the rate limit resets in {int(self.rate_limit_reset - now)} seconds."
+            )
+            loop = asyncio.get_running_loop()
+            self.reset_timer = loop.call_later(self.rate_limit_reset - now, self._on_reset)
+        return False
+
+    def _on_reset(self):
+        self.reset_timer = None
+        self._dispatch()
+
+    def _next_priority(self):
+        bulk_ready = len(self.waiters[BULK]) > 0 and self._bulk_budget_available()
+
+        if bulk_ready and self.active[BULK] < self.bulk_reserved:
+            return BULK
+        if self.waiters[INTERACTIVE]:
+            return INTERACTIVE
+        if bulk_ready:
+            return BULK
+        return None
+
+    def _dispatch(self):
+        """ Grants free slots to waiting requests, highest priority first.
+        """
+        while self.active[INTERACTIVE] + self.active[BULK] < self.max_concurrency:
+            priority = self._next_priority()
+            if priority is None:
+                return
+
+            waiter = self.waiters[priority].popleft()
+            if waiter.done():
+                # Cancelled while waiting.
+                continue
+
+            self.active[priority] += 1
+            waiter.set_result(None)
+
+    async def acquire(self, priority):
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[priority].append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if not waiter.cancelled():
+                # The slot was granted just before the cancellation arrived.
+                self.release(priority)
+            raise
+
+    def release(self, priority):
+        self.active[priority] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self):
+        """ Holds a request slot, at the priority of the current context, for
+        the duration of the with block.
+        """
+        priority = current_priority.get()
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def update(self, headers):
+        """ Tracks the rate-limit budget from the headers of an API response.
+        """
+        if 'x-ratelimit-remaining' not in headers or 'x-ratelimit-reset' not in headers:
+            return
+
+        self.rate_limit_remaining = int(headers['x-ratelimit-remaining'])
+        self.rate_limit_reset = int(headers['x-ratelimit-reset'])
+        self._dispatch()
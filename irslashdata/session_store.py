@@ -0,0 +1,107 @@
+from irslashdata import logger
+
+from datetime import datetime, timezone
+import base64
+import hashlib
+import json
+import os
+
+
+# This module persists the authenticated session cookies to an encrypted local
+# file so that a new process can skip the login POST while the cookies are
+# still valid. The encryption key is derived from the encoded password, so
+# the file can only be read back by a Client holding the same credentials.
+# Encryption requires the optional 'cryptography' package.
+
+KEY_DERIVATION_ROUNDS = 100000
+
+
+class SessionStore:
+    def __init__(self, path: str, secret: str):
+        """ Reads and writes encrypted session cookies at path. secret is the
+        string the encryption key is derived from, normally the encoded
+        password held by Client.
+        """
+        # Imported here so that importing the client doesn't pay for it.
+        try:
+            from cryptography.fernet import Fernet, InvalidToken
+        except ImportError:
+            raise ImportError(
+                "The 'cryptography' package is required to persist session cookies."
+            )
+        self.invalid_token = InvalidToken
+
+        self.path = path
+        salt = hashlib.sha256(os.path.abspath(path).encode('utf-8')).digest()
+        key = hashlib.pbkdf2_hmac('sha256', secret.encode('utf-8'), salt, KEY_DERIVATION_ROUNDS)
+        self.fernet = Fernet(base64.urlsafe_b64encode(key))
+
+    def load(self, cookies):
+        """ Loads the unexpired cookies stored at self.path into the
+        httpx.Cookies instance cookies. Returns the number of cookies loaded.
+        A missing, unreadable or undecryptable file loads nothing.
+        """
+        try:
+            with open(self.path, 'rb') as session_file:
+                token = session_file.read()
+        except FileNotFoundError:
+            return 0
+        except OSError as exc:
+            logger.warning(f"Could not read session file {self.path}: {exc}")
+            return 0
+
+        try:
+            stored_cookies = json.loads(self.fernet.decrypt(token))
+        except (self.invalid_token, ValueError):
+            logger.warning(f"Session file {self.path} could not be decrypted. Ignoring it.")
+            return 0
+
+        now = datetime.now(timezone.utc).timestamp()
+        loaded = 0
+
+        for cookie in stored_cookies:
+            if cookie['expires'] is not None and cookie['expires'] <= now:
+                continue
+
+            cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
+            loaded += 1
+
+        logger.info(f"Loaded {loaded} cookies from session file.")
+        return loaded
+
+    def save(self, cookies):
+        """ Encrypts the cookies held in the httpx.Cookies instance cookies and
+        writes them to self.path, replacing any previous file atomically.
+        """
+        stored_cookies = []
+
+        for cookie in cookies.jar:
+            stored_cookies.append({
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'expires': cookie.expires
+            })
+
+        token = self.fernet.encrypt(json.dumps(stored_cookies).encode('utf-8'))
+        temp_path = self.path + '.tmp'
+
+        try:
+            descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(descriptor, 'wb') as session_file:
+                session_file.write(token)
+            os.replace(temp_path, self.path)
+        except OSError as exc:
+            logger.warning(f"Could not write session file {self.path}: {exc}")
+            return
+
+        logger.debug(f"Saved {len(stored_cookies)} cookies to session file.")
+
+    def clear(self):
+        """ Removes the session file, if present.
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,105 @@
+from irslashdata import logger
+
+import mmap
+import os
+import pickle
+import struct
+
+
+# This module stores reference datasets in a single local file so that a
+# restarted service can use them without any API round-trips.
+
+# File layout:
+#   MAGIC | header length (8 bytes, little endian) | pickled header | sections
+# The header maps each dataset name to the (offset, length) of its pickled
+# section, relative to the end of the header, and holds the time each dataset
+# was fetched. The file is memory mapped and a section is only unpickled the
+# first time it is read.
+
+# Snapshots are pickles: only load files written by this module.
+
+MAGIC = b'IRSDSNAP1'
+HEADER_LENGTH = struct.Struct('<Q')
+
+
+def write_snapshot(path: str, datasets: dict, loaded_at: dict):
+    """ Writes datasets, a dict of dataset name to picklable value, to path.
+    loaded_at maps each dataset name to the timestamp it was fetched at.
+    The file is replaced atomically.
+    """
+    sections = []
+    offsets = {}
+    offset = 0
+
+    for name, value in datasets.items():
+        section = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        offsets[name] = (offset, len(section))
+        offset += len(section)
+        sections.append(section)
+
+    header = pickle.dumps({'sections': offsets, 'loaded_at': loaded_at}, protocol=pickle.HIGHEST_PROTOCOL)
+    base = len(MAGIC) + HEADER_LENGTH.size + len(header)
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as snapshot_file:
+        snapshot_file.write(MAGIC)
+        snapshot_file.write(HEADER_LENGTH.pack(len(header)))
+        snapshot_file.write(header)
+        for section in sections:
+            snapshot_file.write(section)
+    os.replace(temp_path, path)
+
+    logger.info(f"Wrote snapshot of {len(datasets)} datasets ({base + offset} bytes) to {path}.")
+
+
+class Snapshot:
+    def __init__(self, path: str):
+        """ Opens the snapshot at path. Raises ValueError if the file is not a
+        snapshot or is truncated or damaged, and OSError if it can't be read.
+        """
+        with open(path, 'rb') as snapshot_file:
+            self.map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not an irslashdata snapshot.")
+
+        header_start = len(MAGIC) + HEADER_LENGTH.size
+
+        # A file left half-written or damaged fails here rather than on first
+        # access to one of its sections.
+        try:
+            (header_length,) = HEADER_LENGTH.unpack(self.map[len(MAGIC):header_start])
+            header = pickle.loads(self.map[header_start:header_start + header_length])
+            sections = header['sections']
+            loaded_at = header['loaded_at']
+            end = max((offset + length for offset, length in sections.values()), default=0)
+        except (struct.error, pickle.UnpicklingError, EOFError, KeyError, TypeError, ValueError, AttributeError) as exc:
+            self.map.close()
+            raise ValueError(f"{path} is a damaged snapshot: {exc!r}")
+
+        self.base = header_start + header_length
+        if self.base + end > len(self.map):
+            self.map.close()
+            raise ValueError(f"{path} is a truncated snapshot.")
+
+        self.sections = sections
+        self.loaded_at = loaded_at
+        self.cache = {}
+
+    def __contains__(self, name):
+        return name in self.sections
+
+    def __getitem__(self, name):
+        if name not in self.cache:
+            offset, length = self.sections[name]
+            start = self.base + offset
+            try:
+                self.cache[name] = pickle.loads(self.map[start:start + length])
+            except (pickle.UnpicklingError, EOFError) as exc:
+                raise ValueError(f"Snapshot section {name} is damaged: {exc!r}")
+
+        return self.cache[name]
+
+    def close(self):
+        self.map.close()
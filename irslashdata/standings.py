@@ -0,0 +1,239 @@
+from irslashdata import logger
+from irslashdata.constants import SimSessionType
+
+import os
+import pickle
+
+
+# This module keeps season standings and per-driver season summaries up to
+# date from subsession_data() payloads. Each race added only touches the
+# drivers in it and their week for that race, so adding a race costs in
+# proportion to its size rather than to the season.
+
+# A driver's score for a week comes from their race points that week through
+# the points policy. Their season score is the sum of their best weeks, where
+# the number of weeks counted is the number of weeks raced in the season so
+# far less drop_weeks.
+
+
+def _average_top_quarter(points):
+    """ The average of the best quarter of the week's races, rounding the
+    number of races counted up.
+    """
+    counted = sorted(points, reverse=True)[:max(1, (len(points) + 3) // 4)]
+    return sum(counted) / len(counted)
+
+
+POINTS_POLICIES = {
+    'best': max,
+    'sum': sum,
+    'average': lambda points: sum(points) / len(points),
+    'average_top_quarter': _average_top_quarter,
+}
+
+
+class DriverSeason:
+    """ One driver's aggregates for one car class in one season.
+    """
+    def __init__(self, cust_id):
+        self.cust_id = cust_id
+        self.display_name = None
+        self.starts = 0
+        self.wins = 0
+        self.top5 = 0
+        self.incidents = 0
+        self.irating_delta = 0
+        # race_week_num: [race points]
+        self.week_points = {}
+        # race_week_num: score from the points policy
+        self.week_scores = {}
+
+    def to_dict(self, points):
+        return {
+            'cust_id': self.cust_id,
+            'display_name': self.display_name,
+            'points': points,
+            'starts': self.starts,
+            'wins': self.wins,
+            'top5': self.top5,
+            'incidents': self.incidents,
+            'irating_delta': self.irating_delta,
+            'weeks': len(self.week_scores)
+        }
+
+
+class StandingsEngine:
+    def __init__(self, drop_weeks: int = 0, points_policy='average_top_quarter'):
+        """ drop_weeks is the number of worst weeks left out of each driver's
+        season score. points_policy turns a driver's race points in one week
+        into their score for it: one of POINTS_POLICIES, or a callable taking
+        the list of points.
+        """
+        self.drop_weeks = drop_weeks
+        self.points_policy = points_policy
+
+        # (season_id, car_class_id, cust_id): DriverSeason
+        self.drivers = {}
+        # (season_id, car_class_id): {'subsessions': ..., 'starts': ...}
+        self.classes = {}
+        # season_id: set of subsession_ids already added
+        self.subsessions = {}
+        # season_id: set of race_week_nums with results
+        self.season_weeks = {}
+
+    def _policy(self):
+        if callable(self.points_policy):
+            return self.points_policy
+        return POINTS_POLICIES[self.points_policy]
+
+    def _race_results(self, subsession):
+        """ Returns the result rows of the race simsession, one per driver,
+        each paired with its team row for team events.
+        """
+        for session_result in subsession.get('session_results', []):
+            if 'simsession_type' in session_result:
+                if session_result['simsession_type'] != SimSessionType.race.value:
+                    continue
+            elif session_result.get('simsession_number') != 0:
+                continue
+
+            for result in session_result.get('results', []):
+                if 'driver_results' in result:
+                    for driver_result in result['driver_results']:
+                        yield driver_result, result
+                elif 'cust_id' in result:
+                    yield result, result
+
+    def add_subsession(self, subsession):
+        """ Adds the race of a subsession_data() payload to the aggregates.
+        Returns False if it had already been added or has no season_id.
+        """
+        season_id = subsession.get('season_id')
+        subsession_id = subsession.get('subsession_id')
+
+        if season_id is None or subsession_id is None:
+            return False
+
+        added = self.subsessions.setdefault(season_id, set())
+        if subsession_id in added:
+            return False
+        added.add(subsession_id)
+
+        race_week_num = subsession.get('race_week_num')
+        self.season_weeks.setdefault(season_id, set()).add(race_week_num)
+        policy = self._policy()
+
+        for result, team_result in self._race_results(subsession):
+            car_class_id = result.get('car_class_id', team_result.get('car_class_id'))
+            finish_position = result.get('finish_position', team_result.get('finish_position'))
+
+            class_key = (season_id, car_class_id)
+            if class_key not in self.classes:
+                self.classes[class_key] = {'subsessions': set(), 'starts': 0}
+            self.classes[class_key]['subsessions'].add(subsession_id)
+            self.classes[class_key]['starts'] += 1
+
+            key = (season_id, car_class_id, result['cust_id'])
+            if key not in self.drivers:
+                self.drivers[key] = DriverSeason(result['cust_id'])
+            driver = self.drivers[key]
+
+            driver.display_name = result.get('display_name', driver.display_name)
+            driver.starts += 1
+            if finish_position is not None:
+                # finish_position is zero-based.
+                driver.wins += finish_position == 0
+                driver.top5 += finish_position < 5
+            driver.incidents += result.get('incidents', 0) or 0
+            if result.get('oldi_rating', -1) >= 0 and result.get('newi_rating', -1) >= 0:
+                driver.irating_delta += result['newi_rating'] - result['oldi_rating']
+
+            points = result.get('champ_points', team_result.get('champ_points'))
+            if points is not None:
+                week = driver.week_points.setdefault(race_week_num, [])
+                week.append(points)
+                driver.week_scores[race_week_num] = policy(week)
+
+        return True
+
+    def add_subsessions(self, subsessions):
+        """ Adds every payload in subsessions and returns how many were new.
+        """
+        return sum(1 for subsession in subsessions if subsession is not None and self.add_subsession(subsession))
+
+    def season_points(self, season_id, driver):
+        counted = max(len(self.season_weeks.get(season_id, ())) - self.drop_weeks, 1)
+        return sum(sorted(driver.week_scores.values(), reverse=True)[:counted])
+
+    def standings(self, season_id, car_class_id=None):
+        """ Returns the standings of a season as a list of driver dicts sorted
+        by points, for one car class or, if car_class_id is None, for every
+        class together.
+        """
+        entries = [
+            driver for (driver_season_id, driver_class_id, _), driver in self.drivers.items()
+            if driver_season_id == season_id and (car_class_id is None or driver_class_id == car_class_id)
+        ]
+
+        table = [driver.to_dict(self.season_points(season_id, driver)) for driver in entries]
+        table.sort(key=lambda row: row['points'], reverse=True)
+        return table
+
+    def driver_summary(self, season_id, cust_id):
+        """ Returns one dict per car class the driver raced in the season.
+        """
+        return [
+            dict(driver.to_dict(self.season_points(season_id, driver)), car_class_id=driver_class_id)
+            for (driver_season_id, driver_class_id, driver_cust_id), driver in self.drivers.items()
+            if driver_season_id == season_id and driver_cust_id == cust_id
+        ]
+
+    def class_summary(self, season_id, car_class_id):
+        class_stats = self.classes.get((season_id, car_class_id))
+        if class_stats is None:
+            return None
+
+        return {
+            'season_id': season_id,
+            'car_class_id': car_class_id,
+            'subsessions': len(class_stats['subsessions']),
+            'starts': class_stats['starts']
+        }
+
+    def save(self, path: str):
+        """ Writes the aggregates to path. A callable points_policy is not
+        saved and has to be set again after load().
+        """
+        state = {
+            'drop_weeks': self.drop_weeks,
+            'points_policy': self.points_policy if not callable(self.points_policy) else None,
+            'drivers': self.drivers,
+            'classes': self.classes,
+            'subsessions': self.subsessions,
+            'season_weeks': self.season_weeks
+        }
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as state_file:
+            pickle.dump(state, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def load(self, path: str):
+        """ Restores aggregates saved by save(). Only load files written by
+        this module. Returns False if there is no file at path.
+        """
+        try:
+            with open(path, 'rb') as state_file:
+                state = pickle.load(state_file)
+        except FileNotFoundError:
+            return False
+
+        self.drop_weeks = state['drop_weeks']
+        if state['points_policy'] is not None:
+            self.points_policy = state['points_policy']
+        self.drivers = state['drivers']
+        self.classes = state['classes']
+        self.subsessions = state['subsessions']
+        self.season_weeks = state['season_weeks']
+        logger.info(f"Loaded standings for {len(self.subsessions)} seasons from {path}.")
+        return True
@@ -0,0 +1,101 @@
+import codecs
+import json
+
+
+# This module decodes a JSON array, such as a chunk file, one element at a
+# time as its bytes arrive, so each record can be used as soon as it is
+# complete without holding the whole body and the whole list in memory.
+
+WHITESPACE = ' \t\n\r'
+
+
+class JsonArrayParser:
+    def __init__(self):
+        """ Feed the bytes of a JSON array to feed() as they arrive; it
+        returns the elements completed by them. Call close() at the end.
+        """
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.started = False
+        self.finished = False
+
+    def _skip(self, characters):
+        while self.position < len(self.buffer) and self.buffer[self.position] in characters:
+            self.position += 1
+
+    def _parse(self, final):
+        elements = []
+
+        if not self.started:
+            self._skip(WHITESPACE)
+            if self.position == len(self.buffer):
+                return elements
+            if self.buffer[self.position] != '[':
+                raise ValueError("Expected a JSON array.")
+            self.position += 1
+            self.started = True
+
+        while not self.finished:
+            self._skip(WHITESPACE + ',')
+            if self.position == len(self.buffer):
+                break
+            if self.buffer[self.position] == ']':
+                self.finished = True
+                break
+
+            try:
+                element, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                # The element isn't complete yet.
+                break
+
+            if not isinstance(element, (dict, list, str)):
+                # A number is only complete once followed by a separator:
+                # '12' may be the start of '12.5'.
+                following = end
+                while following < len(self.buffer) and self.buffer[following] in WHITESPACE:
+                    following += 1
+                if following == len(self.buffer) or self.buffer[following] not in ',]':
+                    if final:
+                        raise ValueError(f"Unexpected data after element at character {end}.")
+                    break
+
+            elements.append(element)
+            self.position = end
+
+        # Drop what has been consumed so the buffer only holds the element in progress.
+        if self.position > 65536 or self.position == len(self.buffer):
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+
+        return elements
+
+    def feed(self, data: bytes):
+        text = self.text_decoder.decode(data)
+        if not text:
+            return []
+
+        self.buffer += text
+
+        # Only a closing bracket or brace can complete an object or array
+        # element, so skip the decode attempt while none has arrived.
+        if self.started and '}' not in text and ']' not in text and ',' not in text:
+            return []
+
+        return self._parse(final=False)
+
+    def close(self):
+        """ Returns any remaining elements. Raises ValueError if the array
+        was incomplete or malformed.
+        """
+        self.buffer += self.text_decoder.decode(b'', final=True)
+        elements = self._parse(final=True)
+
+        if not self.finished:
+            raise ValueError("JSON array ended unexpectedly.")
+
+        return elements
@@ -0,0 +1,24 @@
+# This module holds transforms for search_results() and lap_data(). They turn
+# the records of a chunk file into compact structures while still in the
+# decode_executor, so that a ProcessPoolExecutor sends back far less to
+# unpickle on the event loop than the full list of dicts. They are plain
+# classes so they can be pickled.
+
+
+class RecordTuples:
+    def __init__(self, fields):
+        """ Keeps only fields of each record, as a tuple in the order given.
+        Missing fields are None.
+
+        Usage:
+            laps = await client.lap_data(subsession_id, 0, transform=RecordTuples(['cust_id', 'lap_time']))
+        """
+        self.fields = tuple(fields)
+
+    def __call__(self, records):
+        fields = self.fields
+        return [tuple(record.get(field) for field in fields) for record in records]
+
+    def __repr__(self):
+        # Part of the request key, so calls with different fields aren't shared.
+        return f"RecordTuples({list(self.fields)!r})"
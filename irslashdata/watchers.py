@@ -0,0 +1,274 @@
+from irslashdata import logger
+from irslashdata.exceptions import AuthenticationError, ServerDownError, IracingError
+
+from datetime import datetime, timezone
+import asyncio
+
+
+# This module polls endpoints on a schedule and emits only what changed
+# between polls as an async stream, so consumers don't have to re-process the
+# whole payload each time.
+
+
+def _race_guide_key(session):
+    """ Sessions that have been created carry a session_id. Scheduled sessions
+    that don't exist yet are identified by their season and start time.
+    """
+    if 'session_id' in session:
+        return session['session_id']
+
+    return (session.get('season_id'), session.get('start_time'))
+
+
+class RaceGuideWatcher:
+    def __init__(self, client, interval: float = 30):
+        """ Polls client.race_guide() every interval seconds. Each poll asks
+        for sessions from the current time onwards, including the ones that
+        are still running, and is compared with the previous snapshot.
+
+        Usage:
+            async for diff in RaceGuideWatcher(client).watch():
+                diff['added'], diff['removed'], diff['changed']
+        """
+        self.client = client
+        self.interval = interval
+        self.sessions = {}
+
+    async def poll(self):
+        """ Fetches the race guide once and returns a dict of 'added',
+        'removed' and 'changed' session lists relative to the previous poll.
+        Returns None if the race guide could not be retrieved, leaving the
+        previous snapshot in place.
+        """
+        from_time = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%MZ')
+        race_guide = await self.client.race_guide(from_time=from_time, include_end_after_time=True)
+
+        if race_guide is None:
+            logger.info("Race guide could not be retrieved. Keeping the previous snapshot.")
+            return None
+
+        sessions = {}
+        for session in race_guide['sessions']:
+            sessions[_race_guide_key(session)] = session
+
+        added = []
+        changed = []
+        for key, session in sessions.items():
+            if key not in self.sessions:
+                added.append(session)
+            elif self.sessions[key] != session:
+                changed.append(session)
+
+        removed = [session for key, session in self.sessions.items() if key not in sessions]
+
+        self.sessions = sessions
+
+        return {
+            'added': added,
+            'removed': removed,
+            'changed': changed
+        }
+
+    async def watch(self):
+        """ Async generator yielding a diff from poll() every time at least one
+        session was added, removed or changed. The first diff lists every
+        current session as added.
+        """
+        while True:
+            diff = await self.poll()
+
+            if diff is not None and (diff['added'] or diff['removed'] or diff['changed']):
+                yield diff
+
+            await asyncio.sleep(self.interval)
+
+
+def _iso_minutes(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%MZ')
+
+
+def _result_cust_ids(subsession):
+    """ Returns the cust_ids of every driver in a subsession_data() payload,
+    including the drivers of team entries.
+    """
+    cust_ids = set()
+
+    for session_result in subsession.get('session_results', []):
+        for result in session_result.get('results', []):
+            if 'cust_id' in result:
+                cust_ids.add(result['cust_id'])
+            for driver_result in result.get('driver_results', []):
+                if 'cust_id' in driver_result:
+                    cust_ids.add(driver_result['cust_id'])
+
+    return cust_ids
+
+
+class FollowedResultsWatcher:
+    def __init__(
+        self,
+        client,
+        cust_ids,
+        interval: float = 60,
+        overlap: float = 5 * 60,
+        series_ids=None,
+        max_concurrency: int = 4,
+        season_refresh: float = 60 * 60
+    ):
+        """ Watches for new official results of the drivers in cust_ids.
+
+        Instead of searching per driver, every poll searches each current
+        series for the current race week, in a window of finishes starting
+        overlap seconds before the previous poll, and matches the drivers
+        locally. Results rows that don't list drivers are matched through
+        subsession_data(). series_ids limits the series polled; by default
+        every series in current_seasons() is, refreshed every season_refresh
+        seconds.
+
+        Usage:
+            async for new_result in FollowedResultsWatcher(client, cust_ids).watch():
+                new_result['subsession_id'], new_result['cust_ids']
+        """
+        self.client = client
+        self.cust_ids = set(cust_ids)
+        self.interval = interval
+        self.overlap = overlap
+        self.series_ids = series_ids
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.season_refresh = season_refresh
+
+        # series_id: race_week_num
+        self.race_weeks = {}
+        self.race_weeks_loaded_at = None
+        self.last_poll = None
+        # subsession_id: time first seen, so results in the overlap aren't emitted twice
+        self.seen = {}
+
+    def follow(self, cust_id):
+        self.cust_ids.add(cust_id)
+
+    def unfollow(self, cust_id):
+        self.cust_ids.discard(cust_id)
+
+    async def _load_race_weeks(self, now):
+        if self.race_weeks_loaded_at is not None and now - self.race_weeks_loaded_at < self.season_refresh:
+            return
+
+        seasons = await self.client.current_seasons()
+        if seasons is None:
+            logger.info("Current seasons could not be retrieved. Keeping the previous race weeks.")
+            return
+
+        self.race_weeks = {
+            season['series_id']: season.get('race_week')
+            for season in seasons
+            if 'series_id' in season and (self.series_ids is None or season['series_id'] in self.series_ids)
+        }
+        self.race_weeks_loaded_at = now
+
+    async def _search_series(self, series_id, race_week_num, finish_range_begin, finish_range_end):
+        """ Returns the search rows, or None if the search failed.
+        """
+        async with self.semaphore:
+            try:
+                return await self.client.search_results(
+                    series_id=series_id,
+                    race_week_num=race_week_num,
+                    finish_range_begin=finish_range_begin,
+                    finish_range_end=finish_range_end,
+                    raise_errors=True
+                )
+            except (AuthenticationError, ServerDownError):
+                raise
+            except IracingError as exc:
+                logger.info(f"Search of series {series_id} failed: {exc}")
+                return None
+
+    async def _match(self, subsession_id, rows):
+        """ Returns the followed cust_ids in a subsession, from its rows if
+        they list drivers and from subsession_data() otherwise, and the
+        fetched payload. Returns (None, None) if it couldn't be fetched, so
+        the subsession is tried again on the next poll.
+        """
+        row_cust_ids = {row['cust_id'] for row in rows if 'cust_id' in row}
+        if row_cust_ids:
+            return row_cust_ids & self.cust_ids, None
+
+        async with self.semaphore:
+            subsession = await self.client.subsession_data(subsession_id)
+
+        if subsession is None:
+            return None, None
+
+        return _result_cust_ids(subsession) & self.cust_ids, subsession
+
+    async def poll(self):
+        """ Searches every followed series once and returns a list of dicts
+        for subsessions not seen before that include followed drivers, each
+        with 'subsession_id', the matched 'cust_ids', the search 'rows' and,
+        when it had to be fetched, the 'subsession' payload.
+        """
+        now = datetime.now(timezone.utc).timestamp()
+        await self._load_race_weeks(now)
+
+        if self.race_weeks_loaded_at is None:
+            # Nothing has been searched, so the window must not move on.
+            return []
+
+        window_start = (self.last_poll if self.last_poll is not None else now - self.interval) - self.overlap
+        finish_range_begin = _iso_minutes(window_start)
+        finish_range_end = _iso_minutes(now + 60)
+
+        searches = await asyncio.gather(*[
+            self._search_series(series_id, race_week_num, finish_range_begin, finish_range_end)
+            for series_id, race_week_num in self.race_weeks.items()
+        ])
+
+        # The window only moves on once every series has been searched in
+        # it, so results finishing during an outage are found afterwards.
+        if all(rows is not None for rows in searches):
+            self.last_poll = now
+        else:
+            logger.info("Some series searches failed. Searching the same window again next poll.")
+
+        rows_by_subsession = {}
+        for rows in searches:
+            for row in rows or []:
+                if 'subsession_id' in row and row['subsession_id'] not in self.seen:
+                    rows_by_subsession.setdefault(row['subsession_id'], []).append(row)
+
+        subsession_ids = list(rows_by_subsession)
+        matches = await asyncio.gather(*[
+            self._match(subsession_id, rows_by_subsession[subsession_id])
+            for subsession_id in subsession_ids
+        ])
+
+        new_results = []
+        for subsession_id, (cust_ids, subsession) in zip(subsession_ids, matches):
+            if cust_ids is None:
+                continue
+
+            self.seen[subsession_id] = now
+            if cust_ids:
+                new_results.append({
+                    'subsession_id': subsession_id,
+                    'cust_ids': cust_ids,
+                    'rows': rows_by_subsession[subsession_id],
+                    'subsession': subsession
+                })
+
+        # Only subsessions that can still fall inside the search window matter.
+        for subsession_id in [key for key, seen_at in self.seen.items() if seen_at < window_start - self.interval]:
+            del self.seen[subsession_id]
+
+        return new_results
+
+    async def watch(self):
+        """ Async generator yielding each new result from poll() as soon as
+        its poll completes.
+        """
+        while True:
+            for new_result in await self.poll():
+                yield new_result
+
+            await asyncio.sleep(self.interval)